@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     'name': 'Task Management Pro',
-    'version': '18.0.1.0.0',
+    'version': '18.0.1.2.0',
     'category': 'Productivity',
     'sequence': 5,
     'summary': 'Advanced Task Management System with Team Collaboration',
@@ -19,6 +19,7 @@ A comprehensive task management system with:
     'website': 'https://daffodilplaza.com/',
     'depends': [
         'base',
+        'bus',
         'mail',
         'calendar',
         'portal',
@@ -28,6 +29,8 @@ A comprehensive task management system with:
         'security/task_security.xml',
         'security/ir.model.access.csv',
         'data/task_stages.xml',
+        'data/task_notification_data.xml',
+        'data/task_cron_data.xml',
         'views/task_team_views.xml',
         'views/task_views.xml',
         'views/task_kanban_views.xml',
@@ -35,7 +38,7 @@ A comprehensive task management system with:
         'views/task_calendar_views.xml',
         'views/task_activity_views.xml',
         'views/task_reporting_views.xml',
-        # 'views/task_template_views.xml',
+        'views/task_template_views.xml',
         'views/task_config_settings.xml',
         'views/task_menu.xml',
     ],
@@ -45,6 +48,7 @@ A comprehensive task management system with:
             'task_management/static/src/scss/task_management.scss',
             'task_management/static/src/css/task_kanban.css',
             # 'task_management/static/src/js/task_widget.js',
+            'task_management/static/src/js/task_kanban_bus.js',
             
         ],
     },
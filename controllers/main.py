@@ -2,24 +2,77 @@
 
 from odoo import http
 from odoo.http import request
+from werkzeug.exceptions import NotFound
+
+from ..models.task_metrics import METRICS_ENABLED, METRICS_TOKEN, instrument, render_prometheus
+import hmac
 
 
 class TaskController(http.Controller):
     
     @http.route('/task_management/info', type='json', auth='user')
+    @instrument('route.info')
     def get_task_info(self, **kwargs):
         """Get basic task management info"""
-        user = request.env.user
+        _etag, stats = request.env['task.management'].get_dashboard_stats()
+        return {
+            'my_tasks': stats['my_tasks'],
+            'open_tasks': stats['open_tasks'],
+            'user_name': request.env.user.name,
+        }
+    
+    @http.route('/task_management/dashboard', type='http', auth='user', methods=['GET'])
+    @instrument('route.dashboard')
+    def get_dashboard_stats(self, **kwargs):
+        """Dashboard counters of the current user, with ETag / If-None-Match support"""
         Task = request.env['task.management']
+        headers = [('Cache-Control', 'private, no-cache')]
+        if_none_match = request.httprequest.headers.get('If-None-Match')
+        # Unchanged polls are answered from the cache without running any query
+        etag = Task._get_cached_dashboard_etag()
+        if etag and if_none_match == etag:
+            return request.make_response('', headers=headers + [('ETag', etag)], status=304)
         
-        my_tasks = Task.search_count([('user_id', '=', user.id)])
-        open_tasks = Task.search_count([
-            ('user_id', '=', user.id),
-            ('is_closed', '=', False)
-        ])
-        
-        return {
-            'my_tasks': my_tasks,
-            'open_tasks': open_tasks,
-            'user_name': user.name,
-        }
\ No newline at end of file
+        etag, stats = Task.get_dashboard_stats()
+        if if_none_match == etag:
+            return request.make_response('', headers=headers + [('ETag', etag)], status=304)
+        return request.make_json_response(stats, headers=headers + [('ETag', etag)])
+    
+    @http.route('/task_management/workload', type='json', auth='user', methods=['POST'])
+    @instrument('route.workload')
+    def get_team_workload(self, team_id, date_from=None, date_to=None, **kwargs):
+        """Per-member workload of a team and its sub-teams"""
+        return request.env['task.workload'].get_team_workload(int(team_id), date_from, date_to)
+    
+    @http.route('/task_management/sync', type='json', auth='user')
+    @instrument('route.sync')
+    def sync_changes(self, cursor=None, limit=None, **kwargs):
+        """Tasks, subtasks and time logs changed since the given cursor"""
+        Sync = request.env['task.sync']
+        if limit:
+            return Sync.get_changes(cursor, limit=limit)
+        return Sync.get_changes(cursor)
+    
+    @http.route('/task_management/batch', type='json', auth='user', methods=['POST'])
+    @instrument('route.batch')
+    def batch(self, operations, **kwargs):
+        """Run create/read/update operations on tasks, subtasks and time logs in one transaction"""
+        return request.env['task.batch'].execute(operations)
+    
+    @http.route('/task_management/template/instantiate', type='json', auth='user', methods=['POST'])
+    @instrument('route.template_instantiate')
+    def instantiate_template(self, template_id, targets, **kwargs):
+        """Create one task (with its subtasks) per target from a template"""
+        return request.env['task.template'].browse(int(template_id)).instantiate(targets)
+    
+    @http.route('/task_management/metrics', type='http', auth='none', methods=['GET'], save_session=False)
+    def metrics(self, **kwargs):
+        """Operation metrics of this worker in Prometheus text format (bearer token only)"""
+        if not METRICS_ENABLED or not METRICS_TOKEN:
+            raise NotFound()
+        scheme, _sep, token = request.httprequest.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not hmac.compare_digest(token.strip().encode(), METRICS_TOKEN.encode()):
+            raise NotFound()
+        return request.make_response(render_prometheus(), headers=[
+            ('Content-Type', 'text/plain; version=0.0.4; charset=utf-8'),
+        ])
\ No newline at end of file
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import re
+
+from psycopg2.extras import execute_values
+
+_logger = logging.getLogger(__name__)
+
+# "2024-05-01 10:00:00 - Mitchell Admin: Changed from 4.00h to 6.00h"
+HISTORY_LINE = re.compile(
+    r'^(?P<date>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) - (?P<user>.*): '
+    r'Changed from (?P<old>-?[\d.]+)h to (?P<new>-?[\d.]+)h$'
+)
+
+
+def migrate(cr, version):
+    """
+    Move the legacy Text history of Planned Time changes into
+    task.planned.hours.log, and drop the columns of the change summary now
+    computed from that log.
+    """
+    cr.execute("""
+        ALTER TABLE task_management
+            DROP COLUMN IF EXISTS planned_hours_change_count,
+            DROP COLUMN IF EXISTS planned_hours_last_changed,
+            DROP COLUMN IF EXISTS planned_hours_changed_by
+    """)
+
+    cr.execute("""
+        SELECT 1 FROM information_schema.columns
+         WHERE table_name = 'task_management' AND column_name = 'planned_hours_history'
+    """)
+    if not cr.fetchone():
+        return
+
+    cr.execute("""
+        SELECT u.id, p.name
+          FROM res_users u
+          JOIN res_partner p ON p.id = u.partner_id
+    """)
+    user_ids = {name: user_id for user_id, name in cr.fetchall()}
+
+    cr.execute("""
+        SELECT id, planned_hours_history
+          FROM task_management
+         WHERE planned_hours_history IS NOT NULL AND planned_hours_history != ''
+    """)
+    rows = []
+    for task_id, history in cr.fetchall():
+        for line in history.splitlines():
+            match = HISTORY_LINE.match(line.strip())
+            if match:
+                rows.append((
+                    task_id,
+                    match['date'],
+                    user_ids.get(match['user']),
+                    float(match['old']),
+                    float(match['new']),
+                ))
+
+    if rows:
+        execute_values(cr._obj, """
+            INSERT INTO task_planned_hours_log (task_id, date, user_id, old_value, new_value)
+            VALUES %s
+        """, rows)
+
+    cr.execute("ALTER TABLE task_management DROP COLUMN planned_hours_history")
+    _logger.info('Migrated %s Planned Time history entries to task.planned.hours.log', len(rows))
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+
+import logging
+
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Date the tasks closed before Closed On existed and rebuild the template usage statistics"""
+    cr.execute("""
+        UPDATE task_management
+           SET date_closed = write_date
+         WHERE is_closed AND write_date IS NOT NULL
+    """)
+    _logger.info('Set the closing date of %s closed tasks from their last update', cr.rowcount)
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['task.template']._cron_refresh_usage_stats()
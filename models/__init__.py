@@ -2,13 +2,19 @@
 
 from . import res_config_settings
 from . import task_management
+from . import task_planned_hours_log
+from . import task_notification_log
 from . import task_team
 from . import task_stage
 from . import task_tag
 from . import task_subtask
 from . import task_timesheet_line
+from . import task_timesheet_rollup
 from . import task_recurrence
 from . import task_template
 from . import task_reporting
+from . import task_workload
+from . import task_sync
+from . import task_batch
 from . import task_cover_image_wizard
 from . import task_share_wizard
\ No newline at end of file
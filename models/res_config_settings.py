@@ -40,4 +40,11 @@ class ResConfigSettings(models.TransientModel):
         config_parameter='task_management.notification_deadline',
         default=1,
         help='Send reminder X days before deadline'
+    )
+    
+    task_mute_planned_hours_chatter = fields.Boolean(
+        string='Mute Planned Time Messages',
+        config_parameter='task_management.mute_planned_hours_chatter',
+        default=False,
+        help='Record Planned Time changes in the change log only, without posting chatter messages'
     )
\ No newline at end of file
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api, _
+from odoo.exceptions import MissingError, UserError, ValidationError
+import json
+import logging
+
+_logger = logging.getLogger(__name__)
+
+BATCH_MODELS = ('task.management', 'task.subtask', 'task.timesheet.line')
+BATCH_OPERATIONS = ('create', 'read', 'update')
+BATCH_MAX_OPERATIONS = 1000
+
+
+class TaskBatch(models.AbstractModel):
+    """Run many create/read/update operations on tasks, subtasks and time logs in one call"""
+    _name = 'task.batch'
+    _description = 'Task Batch API'
+
+    @api.model
+    def execute(self, operations):
+        """
+        Run a list of operations in the current transaction.
+
+        Each operation is one of:
+        - {'op': 'create', 'model': ..., 'values': {...}}
+        - {'op': 'read', 'model': ..., 'ids': [...], 'fields': [...]}
+        - {'op': 'update', 'model': ..., 'ids': [...], 'values': {...}}
+
+        Consecutive operations of the same kind are grouped: creates into one
+        multi-record create per model, reads of the same fields into one read,
+        and updates writing the same values into one multi-record write. Only
+        consecutive operations are grouped, so every operation sees the effects
+        of the ones before it. Each group runs in a savepoint; when a group
+        fails its operations are retried one by one so that only the faulty
+        ones report an error.
+
+        :return: one {'success': True, 'result': ...} or {'success': False,
+            'error': message} per operation, in the same order
+        """
+        if len(operations) > BATCH_MAX_OPERATIONS:
+            raise ValidationError(_('A batch cannot contain more than %s operations.') % BATCH_MAX_OPERATIONS)
+
+        results = [None] * len(operations)
+        groups = []
+        for index, operation in enumerate(operations):
+            error = self._check_operation(operation)
+            if error:
+                results[index] = {'success': False, 'error': error}
+                continue
+            key = self._get_group_key(operation)
+            if groups and groups[-1][0] == key:
+                groups[-1][1].append(index)
+            else:
+                groups.append((key, [index]))
+
+        for key, indexes in groups:
+            try:
+                with self.env.cr.savepoint():
+                    group_results = self._run_group(key, [operations[index] for index in indexes])
+            except Exception:
+                self.env.clear()
+                group_results = None
+            if group_results is not None:
+                for index, result in zip(indexes, group_results):
+                    results[index] = {'success': True, 'result': result}
+                continue
+            # Isolate the failing operations of the group
+            for index in indexes:
+                try:
+                    with self.env.cr.savepoint():
+                        result = self._run_group(key, [operations[index]])[0]
+                    results[index] = {'success': True, 'result': result}
+                except UserError as error:
+                    self.env.clear()
+                    _logger.info('Batch operation %s failed: %s', index, error)
+                    results[index] = {'success': False, 'error': error.args[0]}
+                except Exception:
+                    self.env.clear()
+                    # Unexpected errors may carry SQL or internal details: log them, do not return them
+                    _logger.exception('Batch operation %s failed', index)
+                    results[index] = {'success': False, 'error': _('The operation failed because of an unexpected error.')}
+        return results
+
+    @api.model
+    def _check_operation(self, operation):
+        """Return an error message for a malformed operation, or None"""
+        if not isinstance(operation, dict):
+            return _('Operations must be objects.')
+        if operation.get('op') not in BATCH_OPERATIONS:
+            return _('Unknown operation: %s') % operation.get('op')
+        if operation.get('model') not in BATCH_MODELS:
+            return _('Unsupported model: %s') % operation.get('model')
+        if operation['op'] in ('create', 'update') and not isinstance(operation.get('values'), dict):
+            return _('Missing values.')
+        if operation['op'] in ('read', 'update') and not isinstance(operation.get('ids'), list):
+            return _('Missing record ids.')
+        return None
+
+    @api.model
+    def _get_group_key(self, operation):
+        op, model_name = operation['op'], operation['model']
+        if op == 'create':
+            return (op, model_name, None)
+        if op == 'read':
+            return (op, model_name, tuple(operation.get('fields') or ()))
+        return (op, model_name, json.dumps(operation['values'], sort_keys=True, default=str))
+
+    @api.model
+    def _run_group(self, key, operations):
+        """Run operations sharing a group key with a single ORM call; return their results"""
+        op, model_name = key[0], key[1]
+        Model = self.env[model_name]
+        if op == 'create':
+            records = Model.create([operation['values'] for operation in operations])
+            return records.ids
+
+        all_ids = list(dict.fromkeys(record_id for operation in operations for record_id in operation['ids']))
+        records = Model.browse(all_ids)
+        missing_ids = set(all_ids) - set(records.exists().ids)
+        if missing_ids:
+            raise MissingError(_('Records not found: %s') % ', '.join(map(str, sorted(missing_ids))))
+        if op == 'read':
+            values = {row['id']: row for row in records.read(list(operations[0].get('fields') or ()) or None)}
+            return [[values[record_id] for record_id in operation['ids']] for operation in operations]
+
+        records.write(operations[0]['values'])
+        return [True] * len(operations)
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 from odoo import models, fields, api
+import base64
 
 
 class TaskCoverImageWizard(models.TransientModel):
@@ -18,21 +19,34 @@ class TaskCoverImageWizard(models.TransientModel):
         if not self.cover_image:
             return {'type': 'ir.actions.act_window_close'}
         
+        raw = base64.b64decode(self.cover_image)
+        Attachment = self.env['ir.attachment']
+        checksum = Attachment._compute_checksum(raw)
+        old_attachment = self.task_id.displayed_image_id
+        if old_attachment.checksum == checksum:
+            # Same image: keep the cover and its thumbnails
+            return {'type': 'ir.actions.act_window_close'}
+        
+        # Reuse an identical image already attached to the task
+        attachment = Attachment.search([
+            ('res_model', '=', 'task.management'),
+            ('res_id', '=', self.task_id.id),
+            ('checksum', '=', checksum),
+        ], limit=1)
+        if not attachment:
+            attachment = Attachment.create({
+                'name': self.cover_image_filename or 'cover_image.png',
+                'raw': raw,
+                'res_model': 'task.management',
+                'res_id': self.task_id.id,
+                'public': True,
+            })
+        
         # Delete old cover image
-        if self.task_id.displayed_image_id:
-            old_attachment = self.task_id.displayed_image_id
+        if old_attachment:
             self.task_id.displayed_image_id = False
             old_attachment.unlink()
         
-        # Create new attachment
-        attachment = self.env['ir.attachment'].create({
-            'name': self.cover_image_filename or 'cover_image.png',
-            'datas': self.cover_image,
-            'res_model': 'task.management',
-            'res_id': self.task_id.id,
-            'public': True,
-        })
-        
         # Link to task
         self.task_id.displayed_image_id = attachment.id
         
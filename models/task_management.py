@@ -1,12 +1,52 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import UserError, ValidationError
+from odoo.tools import SQL, float_compare
+from .task_metrics import instrument
 from datetime import datetime, timedelta
+from markupsafe import Markup
+import hashlib
+import json
 import logging
+import threading
+import time
 
 _logger = logging.getLogger(__name__)
 
+# Per-user dashboard counters: {(dbname, uid): (expiry, etag, stats)}. Writes in
+# this worker drop them on commit; the TTL bounds staleness across workers.
+DASHBOARD_CACHE_TTL = 60  # seconds
+DASHBOARD_FIELDS = {'stage_id', 'user_id', 'date_deadline', 'priority', 'active', 'team_id', 'team_ids', 'is_closed'}
+_dashboard_cache = {}
+_dashboard_cache_lock = threading.Lock()
+
+# Precision of the time log totals shifted by deltas
+TIMESHEET_TOTAL_DIGITS = 6
+
+# Upper bound of the full-text search document of a task (PostgreSQL tsvectors are limited to 1MB)
+SEARCH_DOCUMENT_MAX_LENGTH = 200000
+
+# Task fields feeding the usage statistics of templates
+TEMPLATE_USAGE_FIELDS = {'template_id', 'stage_id'}
+TEMPLATE_RECENT_USAGE_DAYS = 30
+
+# Kanban state set when a task is moved to one of the default stages
+STAGE_KANBAN_STATES = {
+    'task_management.task_stage_todo': 'normal',
+    'task_management.task_stage_in_progress': 'normal',
+    'task_management.task_stage_review': 'normal',
+    'task_management.task_stage_done': 'done',
+    'task_management.task_stage_cancelled': 'blocked',
+}
+
+# Card fields pushed to open kanban boards over the bus
+KANBAN_BUS_FIELDS = ('stage_id', 'user_id', 'priority', 'date_deadline', 'kanban_state')
+# Task fields deciding who sees a card (see _compute_access_user_ids)
+KANBAN_ACCESS_FIELDS = ('user_id', 'team_id', 'team_ids')
+# Above this many cards for one recipient, a board reload is cheaper than the delta
+KANBAN_BUS_MAX_CARDS = 100
+
 
 class TaskManagement(models.Model):
     _name = 'task.management'
@@ -15,6 +55,8 @@ class TaskManagement(models.Model):
     _rec_name = 'name'
     _order = 'priority desc, sequence, date_deadline asc, id desc'
     _check_company_auto = True
+    _parent_name = 'parent_id'
+    _parent_store = True
 
     # Basic Fields
     name = fields.Char(
@@ -57,7 +99,8 @@ class TaskManagement(models.Model):
         'task.team',
         string='Team',
         ondelete='cascade',
-        tracking=True
+        tracking=True,
+        index=True
     )
     
     # Additional collaborators (using team_ids for compatibility)
@@ -71,6 +114,18 @@ class TaskManagement(models.Model):
         help='Additional users who can access this task'
     )
     
+    # Denormalized access list (assignee, collaborators, team members and manager)
+    # so record rules are a single indexed lookup instead of correlated subqueries
+    access_user_ids = fields.Many2many(
+        'res.users',
+        'task_management_access_rel',
+        'task_id',
+        'user_id',
+        string='Users with Access',
+        compute='_compute_access_user_ids',
+        store=True
+    )
+    
     # Stage and State Management
     stage_id = fields.Many2one(
         'task.stage',
@@ -169,27 +224,23 @@ class TaskManagement(models.Model):
         help='Enable time log entries for this task'
     )
     
-    # COMPUTED: Total Planned Time from all time log entries
+    # Time log totals: maintained by the time log entries themselves
+    # (_apply_timesheet_deltas), so a log change never re-sums its task
     total_planned_hours_from_logs = fields.Float(
         string='Total Planned Time (Logs)',
-        compute='_compute_timesheet_totals',
-        store=True,
+        readonly=True,
         help='Sum of all Planned Time from time log entries'
     )
     
-    # COMPUTED: Total Logged Hours from all time log entries
     total_logged_hours = fields.Float(
         string='Total Actual Time Logged',
-        compute='_compute_timesheet_totals',
-        store=True,
+        readonly=True,
         help='Sum of all Actual Time Logged from time log entries'
     )
     
-    # COMPUTED: Total Remaining from all time log entries
     total_remaining_hours_from_logs = fields.Float(
         string='Total Remaining (Logs)',
-        compute='_compute_timesheet_totals',
-        store=True,
+        readonly=True,
         help='Sum of all Remaining hours from time log entries'
     )
 
@@ -216,8 +267,7 @@ class TaskManagement(models.Model):
     # ============================================
     timesheet_progress = fields.Float(
         string='Time Log Progress %',
-        compute='_compute_timesheet_progress',
-        store=True,
+        readonly=True,
         help='Progress calculated from sum of time log entries'
     )
 
@@ -226,37 +276,37 @@ class TaskManagement(models.Model):
         ('on_track', 'On Track'),
         ('under_estimated', 'Under Estimated'),
         ('not_started', 'Not Started')
-    ], string='Time Log Performance', compute='_compute_timesheet_performance', store=True,
+    ], string='Time Log Performance', default='not_started', readonly=True,
        help='Performance calculated from sum of time log entries')
 
     # ============================================
     # ALLOCATED TIME CHANGE TRACKING (HIGH LEVEL ONLY)
     # ============================================
+    planned_hours_log_ids = fields.One2many(
+        'task.planned.hours.log',
+        'task_id',
+        string='Planned Time Changes Log',
+        readonly=True
+    )
+
     planned_hours_change_count = fields.Integer(
         string='Planned Time Changes',
-        default=0,
-        readonly=True,
+        compute='_compute_planned_hours_change_info',
         help='Number of times Planned Time has been modified'
     )
 
     planned_hours_last_changed = fields.Datetime(
         string='Last Planned Time Change',
-        readonly=True,
+        compute='_compute_planned_hours_change_info',
         help='When Planned Time was last modified'
     )
 
     planned_hours_changed_by = fields.Many2one(
         'res.users',
         string='Last Changed By',
-        readonly=True,
+        compute='_compute_planned_hours_change_info',
         help='User who last modified Planned Time'
     )
-
-    planned_hours_history = fields.Text(
-        string='Planned Time History',
-        readonly=True,
-        help='History of all Planned Time changes'
-    )
     
     # Subtasks
     subtask_ids = fields.One2many(
@@ -278,10 +328,12 @@ class TaskManagement(models.Model):
     )
     
     # Parent Task (for hierarchical tasks)
+    # Deleting a task moves its sub-tasks up to its own parent (see unlink)
     parent_id = fields.Many2one(
         'task.management',
         string='Parent Task',
-        index=True
+        index=True,
+        ondelete='set null'
     )
     
     child_ids = fields.One2many(
@@ -290,6 +342,41 @@ class TaskManagement(models.Model):
         string='Sub-tasks'
     )
     
+    parent_path = fields.Char(index=True)
+    
+    # Subtree rollups (this task and all its descendants), recomputed along the ancestor path
+    subtree_planned_hours = fields.Float(
+        string='Subtree Planned Time',
+        compute='_compute_subtree_rollups',
+        recursive=True,
+        store=True,
+        help='Planned Time of this task and all its sub-tasks'
+    )
+    
+    subtree_logged_hours = fields.Float(
+        string='Subtree Time Logged',
+        compute='_compute_subtree_rollups',
+        recursive=True,
+        store=True,
+        help='Time logged on this task and all its sub-tasks'
+    )
+    
+    subtree_open_count = fields.Integer(
+        string='Open Sub-tasks',
+        compute='_compute_subtree_rollups',
+        recursive=True,
+        store=True,
+        help='Number of open tasks below this one, at any depth'
+    )
+    
+    subtree_deadline = fields.Date(
+        string='Earliest Subtree Deadline',
+        compute='_compute_subtree_rollups',
+        recursive=True,
+        store=True,
+        help='Earliest deadline among the open tasks of this subtree'
+    )
+    
     # Recurrence Fields
     recurring_task = fields.Boolean(string='Recurring Task', default=False)
     recurrence_id = fields.Many2one('task.recurrence', string='Recurrence')
@@ -320,13 +407,42 @@ class TaskManagement(models.Model):
         string='Cover Image'
     )
 
-    # Add this computed field for direct image access
+    # Original cover, only loaded on demand (e.g. when the full image is opened)
     cover_image = fields.Binary(
         string='Cover Image Binary',
         related='displayed_image_id.datas',
         readonly=True
     )
     
+    # Resized covers for lists and kanban cards, stored once per cover change
+    cover_image_128 = fields.Image(
+        string='Cover Thumbnail',
+        related='displayed_image_id.datas',
+        max_width=128,
+        max_height=128,
+        store=True
+    )
+    
+    cover_image_256 = fields.Image(
+        string='Cover Preview',
+        related='displayed_image_id.datas',
+        max_width=256,
+        max_height=256,
+        store=True
+    )
+    
+    # Full-text search document: name, description and subtask names. Time log
+    # notes have their own indexes and are searched alongside (see search_ranked),
+    # so that logging time never rebuilds the document.
+    search_document = fields.Text(
+        string='Search Document',
+        compute='_compute_search_document',
+        store=True,
+        index='trigram',
+        copy=False,
+        prefetch=False
+    )
+    
     # Customer/Partner
     partner_id = fields.Many2one(
         'res.partner',
@@ -347,7 +463,7 @@ class TaskManagement(models.Model):
     )
     
     # Template field
-    template_id = fields.Many2one('task.template', string='Created from Template')
+    template_id = fields.Many2one('task.template', string='Created from Template', index='btree_not_null')
     
     # Computed Fields
     is_closed = fields.Boolean(
@@ -356,6 +472,13 @@ class TaskManagement(models.Model):
         store=True
     )
     
+    date_closed = fields.Datetime(
+        string='Closed On',
+        compute='_compute_date_closed',
+        store=True,
+        copy=False
+    )
+    
     days_to_deadline = fields.Integer(
         string='Days to Deadline',
         compute='_compute_days_to_deadline',
@@ -377,15 +500,125 @@ class TaskManagement(models.Model):
     
     def _get_default_stage_id(self):
         """Get default stage for new tasks"""
-        return self.env['task.stage'].search([('name', '=', 'To-Do')], limit=1)
+        return self.env['task.stage']._get_default_stage()
+    
+    @api.onchange('timesheet_ids')
+    def _onchange_timesheet_ids(self):
+        """Show the totals of the entries edited in the form (saving them applies their deltas)"""
+        for task in self:
+            task.update(self._get_timesheet_rollup_values(
+                sum(task.timesheet_ids.mapped('planned_hours')),
+                sum(task.timesheet_ids.mapped('unit_amount')),
+                sum(task.timesheet_ids.mapped('remaining_hours')),
+            ))
+
+    @api.model
+    def _get_timesheet_rollup_values(self, total_planned, total_logged, total_remaining):
+        """
+        Build the values of every stored time log rollup from the summed entries
+        LOGIC (performance):
+        - Over Estimated: Total Planned > Total Logged (finished faster)
+        - Under Estimated: Total Planned < Total Logged (took longer)
+        - On Track: 80-100% usage
+        """
+        if total_planned > 0:
+            progress = round(100.0 * total_logged / total_planned)
+        else:
+            progress = 0.0
+
+        if not total_planned:
+            performance = 'not_started'
+        elif total_planned > total_logged:
+            # Planned MORE than logged = Over Estimated
+            usage_percent = (total_logged / total_planned) * 100
+            performance = 'on_track' if usage_percent >= 80 else 'over_estimated'
+        elif total_planned < total_logged:
+            # Planned LESS than logged = Under Estimated
+            performance = 'under_estimated'
+        else:
+            # Planned == Logged = Perfect
+            performance = 'on_track'
+
+        return {
+            'total_planned_hours_from_logs': total_planned,
+            'total_logged_hours': total_logged,
+            'total_remaining_hours_from_logs': total_remaining,
+            'timesheet_progress': progress,
+            'timesheet_performance': performance,
+        }
+
+    @api.model
+    def _apply_timesheet_deltas(self, removed, added):
+        """
+        Shift the stored time log totals by the difference between the entries
+        that were removed and added, instead of re-summing every entry. The
+        totals are incremented in SQL, so concurrent time log changes on the
+        same task add up instead of overwriting each other.
+
+        :param removed: {task_id: [planned, logged, remaining]} of the entries before the change
+        :param added: {task_id: [planned, logged, remaining]} of the entries after the change
+        """
+        deltas = {}
+        for totals, sign in ((removed, -1), (added, 1)):
+            for task_id, values in totals.items():
+                if task_id:
+                    delta = deltas.setdefault(task_id, [0.0, 0.0, 0.0])
+                    for index, value in enumerate(values):
+                        delta[index] += sign * value
+        rows = [(task_id,) + tuple(delta) for task_id, delta in deltas.items() if any(delta)]
+        if not rows:
+            return
+        fnames = ['total_planned_hours_from_logs', 'total_logged_hours', 'total_remaining_hours_from_logs',
+                  'timesheet_progress', 'timesheet_performance']
+        self.flush_model(fnames)
+        # Rounded so that repeated deltas do not accumulate float drift
+        self.env.cr.execute("""
+            UPDATE task_management t
+               SET total_planned_hours_from_logs = ROUND((COALESCE(t.total_planned_hours_from_logs, 0) + d.planned)::numeric, {digits}),
+                   total_logged_hours = ROUND((COALESCE(t.total_logged_hours, 0) + d.logged)::numeric, {digits}),
+                   total_remaining_hours_from_logs = ROUND((COALESCE(t.total_remaining_hours_from_logs, 0) + d.remaining)::numeric, {digits}),
+                   write_date = %s
+              FROM (VALUES {values}) AS d (id, planned, logged, remaining)
+             WHERE t.id = d.id
+         RETURNING t.id, t.total_planned_hours_from_logs, t.total_logged_hours, t.total_remaining_hours_from_logs
+        """.format(
+            digits=TIMESHEET_TOTAL_DIGITS,
+            values=', '.join(['(%s, %s::float, %s::float, %s::float)'] * len(rows)),
+        ), [self.env.cr.now()] + [value for row in rows for value in row])
+        # The rows stay locked until commit: progress and performance follow the new totals
+        totals = self.env.cr.fetchall()
+        if totals:
+            values = [(task_id,) + tuple(self._get_timesheet_rollup_values(planned, logged, remaining)[fname]
+                                         for fname in ('timesheet_progress', 'timesheet_performance'))
+                      for task_id, planned, logged, remaining in totals]
+            self.env.cr.execute("""
+                UPDATE task_management t
+                   SET timesheet_progress = d.progress,
+                       timesheet_performance = d.performance
+                  FROM (VALUES %s) AS d (id, progress, performance)
+                 WHERE t.id = d.id
+            """ % ', '.join(['(%s, %s::float, %s)'] * len(values)), [value for row in values for value in row])
+        tasks = self.browse([row[0] for row in totals])
+        tasks.invalidate_recordset(fnames + ['write_date'])
+        # Stored fields depending on the totals (subtree rollups) are recomputed
+        tasks.modified(fnames)
+
+    @api.depends('planned_hours_log_ids')
+    def _compute_planned_hours_change_info(self):
+        """Read change count and last change from the Planned Time log in one query"""
+        summary = self.env['task.planned.hours.log'].sudo()._get_change_summary(self.ids)
+        for task in self:
+            info = summary.get(task.id, {})
+            task.planned_hours_change_count = info.get('count', 0)
+            task.planned_hours_last_changed = info.get('last_date', False)
+            task.planned_hours_changed_by = info.get('last_user_id', False)
     
-    @api.depends('timesheet_ids.planned_hours', 'timesheet_ids.unit_amount', 'timesheet_ids.remaining_hours')
-    def _compute_timesheet_totals(self):
-        """Calculate totals from time log entries (DYNAMIC)"""
+    @api.depends('name', 'description', 'subtask_ids.name')
+    def _compute_search_document(self):
         for task in self:
-            task.total_planned_hours_from_logs = sum(task.timesheet_ids.mapped('planned_hours'))
-            task.total_logged_hours = sum(task.timesheet_ids.mapped('unit_amount'))
-            task.total_remaining_hours_from_logs = sum(task.timesheet_ids.mapped('remaining_hours'))
+            parts = [task.name or '', tools.html2plaintext(task.description or '')]
+            parts += task.subtask_ids.mapped('name')
+            task.search_document = '\n'.join(part for part in parts if part)[:SEARCH_DOCUMENT_MAX_LENGTH]
     
     @api.depends('planned_hours', 'effective_hours')
     def _compute_remaining_hours(self):
@@ -394,16 +627,45 @@ class TaskManagement(models.Model):
             task.remaining_hours = (task.planned_hours or 0.0) - (task.effective_hours or 0.0)
     
     @api.depends('subtask_ids', 'subtask_ids.is_done')
+    @instrument('task.compute_subtask_count')
     def _compute_subtask_count(self):
         for task in self:
             task.subtask_count = len(task.subtask_ids)
             task.subtask_completed_count = len(task.subtask_ids.filtered('is_done'))
     
+    @api.depends(
+        'planned_hours', 'total_logged_hours', 'date_deadline', 'is_closed',
+        'child_ids.subtree_planned_hours', 'child_ids.subtree_logged_hours',
+        'child_ids.subtree_open_count', 'child_ids.subtree_deadline', 'child_ids.is_closed',
+        'child_ids.active',
+    )
+    def _compute_subtree_rollups(self):
+        for task in self:
+            children = task.child_ids
+            task.subtree_planned_hours = task.planned_hours + sum(children.mapped('subtree_planned_hours'))
+            task.subtree_logged_hours = task.total_logged_hours + sum(children.mapped('subtree_logged_hours'))
+            task.subtree_open_count = sum(
+                child.subtree_open_count + (0 if child.is_closed else 1) for child in children
+            )
+            deadlines = [child.subtree_deadline for child in children if child.subtree_deadline]
+            if task.date_deadline and not task.is_closed:
+                deadlines.append(task.date_deadline)
+            task.subtree_deadline = min(deadlines) if deadlines else False
+    
     @api.depends('stage_id', 'stage_id.is_closed')
     def _compute_is_closed(self):
         for task in self:
             task.is_closed = task.stage_id.is_closed if task.stage_id else False
     
+    @api.depends('is_closed')
+    def _compute_date_closed(self):
+        now = fields.Datetime.now()
+        for task in self:
+            if not task.is_closed:
+                task.date_closed = False
+            elif not task.date_closed:
+                task.date_closed = now
+    
     @api.depends('date_deadline')
     def _compute_days_to_deadline(self):
         today = fields.Date.today()
@@ -414,6 +676,11 @@ class TaskManagement(models.Model):
             else:
                 task.days_to_deadline = 0
     
+    @api.depends('user_id', 'team_ids', 'team_id.manager_id', 'team_id.member_ids')
+    def _compute_access_user_ids(self):
+        for task in self:
+            task.access_user_ids = task.user_id | task.team_ids | task.team_id.manager_id | task.team_id.member_ids
+    
     @api.depends('team_id', 'team_id.manager_id', 'team_id.member_ids')
     def _compute_is_user_team_task(self):
         current_user = self.env.user
@@ -478,52 +745,14 @@ class TaskManagement(models.Model):
             else:
                 # Planned == Actual = Perfect
                 task.task_performance = 'on_track'
-
-    @api.depends('timesheet_ids.planned_hours', 'timesheet_ids.unit_amount')
-    def _compute_timesheet_progress(self):
-        """Calculate time log progress from SUM of entries"""
-        for task in self:
-            total_planned = sum(task.timesheet_ids.mapped('planned_hours'))
-            total_logged = sum(task.timesheet_ids.mapped('unit_amount'))
-            
-            if total_planned > 0:
-                task.timesheet_progress = round(100.0 * total_logged / total_planned)
-            else:
-                task.timesheet_progress = 0.0
-
-    @api.depends('timesheet_ids.planned_hours', 'timesheet_ids.unit_amount')
-    def _compute_timesheet_performance(self):
-        """
-        Calculate performance from SUM of time log entries
-        LOGIC:
-        - Over Estimated: Total Planned > Total Logged (finished faster)
-        - Under Estimated: Total Planned < Total Logged (took longer)
-        - On Track: 80-100% usage
-        """
-        for task in self:
-            total_planned = sum(task.timesheet_ids.mapped('planned_hours'))
-            total_logged = sum(task.timesheet_ids.mapped('unit_amount'))
-            
-            if not total_planned or total_planned == 0:
-                task.timesheet_performance = 'not_started'
-                continue
-            
-            if total_planned > total_logged:
-                # Planned MORE than logged = Over Estimated
-                usage_percent = (total_logged / total_planned) * 100
-                if usage_percent >= 80:
-                    task.timesheet_performance = 'on_track'  # 80-100% usage
-                else:
-                    task.timesheet_performance = 'over_estimated'  # < 80% usage
-            elif total_planned < total_logged:
-                # Planned LESS than logged = Under Estimated
-                task.timesheet_performance = 'under_estimated'
-            else:
-                # Planned == Logged = Perfect
-                task.timesheet_performance = 'on_track'
     
     # ========== ONCHANGE METHODS ==========
 
+    @api.constrains('parent_id')
+    def _check_parent_id(self):
+        if self._has_cycle():
+            raise ValidationError(_('You cannot create recursive tasks.'))
+
     @api.constrains('date_start', 'date_deadline')
     def _check_date_range(self):
         """Ensure due date is not before start date"""
@@ -553,18 +782,14 @@ class TaskManagement(models.Model):
     def _onchange_stage_id(self):
         """Handle stage changes"""
         if self.stage_id:
-            # Auto-set kanban state based on stage
-            if self.stage_id.name == 'To-Do':
-                self.kanban_state = 'normal'
-            elif self.stage_id.name == 'In Progress':
-                self.kanban_state = 'normal'
-            elif self.stage_id.name == 'Review':
-                self.kanban_state = 'normal'
-            elif self.stage_id.name == 'Done':
-                self.date_end = fields.Datetime.now()
-                self.kanban_state = 'done'
-            elif self.stage_id.name == 'Cancelled':
-                self.kanban_state = 'blocked'
+            # Auto-set kanban state based on stage (by xml id: names are translated and editable)
+            Stage = self.env['task.stage']
+            for xmlid, kanban_state in STAGE_KANBAN_STATES.items():
+                if self.stage_id == Stage._get_stage_by_xmlid(xmlid):
+                    if xmlid == 'task_management.task_stage_done':
+                        self.date_end = fields.Datetime.now()
+                    self.kanban_state = kanban_state
+                    break
             
             # Set closed status
             if self.stage_id.stage_type in ['done', 'cancelled']:
@@ -600,7 +825,7 @@ class TaskManagement(models.Model):
     @api.model
     def _read_group_stage_ids(self, stages, domain):
         """Return all stages for kanban view grouping"""
-        return self.env['task.stage'].search([])
+        return self.env['task.stage']._get_stage_ids()
     
 
     # ========== ACTION METHODS ==========
@@ -621,6 +846,20 @@ class TaskManagement(models.Model):
             'res_id': self.parent_id.id,
         }
     
+    def action_view_task_tree(self):
+        """Open this task and all its descendants (one parent_path lookup)"""
+        self.ensure_one()
+        return {
+            'name': _('Task Tree'),
+            'type': 'ir.actions.act_window',
+            'res_model': 'task.management',
+            'view_mode': 'list,form',
+            'domain': [('id', 'child_of', self.id)],
+            'context': {
+                'default_parent_id': self.id,
+            }
+        }
+    
     def action_view_subtasks(self):
         self.ensure_one()
         return {
@@ -721,92 +960,171 @@ class TaskManagement(models.Model):
     
     # ========== CRUD METHODS ==========
     
-    @api.model
-    def create(self, vals):
-        # Set default values based on task type
-        if vals.get('task_type') == 'individual':
-            if not vals.get('user_id'):
-                vals['user_id'] = self.env.user.id
-        
-        # Set assignment date if user is assigned
-        if vals.get('user_id'):
-            vals['date_assign'] = fields.Datetime.now()
+    @api.model_create_multi
+    @instrument('task.create')
+    def create(self, vals_list):
+        # Resolve batch-wide defaults once
+        now = fields.Datetime.now()
+        default_stage = self.env['task.stage']._get_default_stage()
         
-        # Set default stage
-        if not vals.get('stage_id'):
-            default_stage = self.env['task.stage'].search([('name', '=', 'To-Do')], limit=1)
-            if default_stage:
+        for vals in vals_list:
+            # Set default values based on task type
+            if vals.get('task_type') == 'individual':
+                if not vals.get('user_id'):
+                    vals['user_id'] = self.env.user.id
+            
+            # Set assignment date if user is assigned
+            if vals.get('user_id'):
+                vals['date_assign'] = now
+            
+            # Set default stage
+            if not vals.get('stage_id') and default_stage:
                 vals['stage_id'] = default_stage.id
         
-        task = super(TaskManagement, self).create(vals)
+        tasks = super(TaskManagement, self).create(vals_list)
+        tasks._update_template_usage()
         
-        # Auto-subscribe assigned user or team members
-        if task.task_type == 'individual' and task.user_id:
-            task.message_subscribe(partner_ids=[task.user_id.partner_id.id])
-        elif task.task_type == 'team' and task.team_id:
-            partners_to_subscribe = []
-            if task.team_id.manager_id:
-                partners_to_subscribe.append(task.team_id.manager_id.partner_id.id)
-            if task.team_id.member_ids:
-                partners_to_subscribe.extend(task.team_id.member_ids.mapped('partner_id').ids)
-            if partners_to_subscribe:
-                task.message_subscribe(partner_ids=partners_to_subscribe)
+        # Auto-subscribe assigned users or team members
+        tasks._subscribe_assignees()
+        self._invalidate_dashboard_cache()
+        tasks._queue_kanban_update()
         
-        return task
+        return tasks
     
-    def write(self, vals):
-        from markupsafe import Markup
+    def _subscribe_assignees(self):
+        """Subscribe assignees (individual) or team manager/members (team) in bulk"""
+        tasks_by_partners = {}
+        for task in self:
+            partners = self.env['res.partner']
+            if task.task_type == 'individual' and task.user_id:
+                partners = task.user_id.partner_id
+            elif task.task_type == 'team' and task.team_id:
+                partners = task.team_id.manager_id.partner_id | task.team_id.member_ids.partner_id
+            if partners:
+                tasks_by_partners.setdefault(tuple(sorted(partners.ids)), []).append(task.id)
         
+        # One follower insert per distinct partner set instead of per task
+        for partner_ids, task_ids in tasks_by_partners.items():
+            self.browse(task_ids).message_subscribe(partner_ids=list(partner_ids))
+    
+    @instrument('task.write')
+    def write(self, vals):
         # Track user assignment
         if 'user_id' in vals:
             vals['date_assign'] = fields.Datetime.now()
         
         # Track Planned Time changes (HIGH LEVEL ONLY)
+        planned_changes = []
         if 'planned_hours' in vals:
+            new_value = vals['planned_hours'] or 0.0
+            planned_changes = [
+                (task.id, task.planned_hours, new_value)
+                for task in self
+                if float_compare(task.planned_hours, new_value, precision_digits=2) != 0
+            ]
+        
+        team_changes = {}
+        if 'team_id' in vals:
             for task in self:
-                old_value = task.planned_hours
-                new_value = vals['planned_hours']
-                
-                if old_value != new_value:
-                    vals['planned_hours_change_count'] = task.planned_hours_change_count + 1
-                    vals['planned_hours_last_changed'] = fields.Datetime.now()
-                    vals['planned_hours_changed_by'] = self.env.user.id
-                    
-                    # Build history
-                    history_entry = f"{fields.Datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {self.env.user.name}: Changed from {old_value:.2f}h to {new_value:.2f}h\n"
-                    vals['planned_hours_history'] = (task.planned_hours_history or '') + history_entry
-                    
-                    # Post message in chatter
-                    message_body = Markup("""
-                        <div style="padding: 12px; background-color: #fff3cd; border-left: 4px solid #ffc107; border-radius: 4px; margin: 10px 0;">
-                            <p style="margin: 0; font-weight: bold; color: #856404; font-size: 14px;">
-                                ⚠️ Planned Time Changed
-                            </p>
-                            <p style="margin: 8px 0 0 0; color: #333;">
-                                Changed from <strong style="color: #d9534f;">{:.2f} hours</strong> to <strong style="color: #5cb85c;">{:.2f} hours</strong>
-                            </p>
-                            <p style="margin: 6px 0 0 0; font-size: 12px; color: #666;">
-                                Change #{} • Changed by: {}
-                            </p>
-                        </div>
-                    """.format(old_value, new_value, vals['planned_hours_change_count'], self.env.user.name))
-                    
-                    task.message_post(
-                        body=message_body,
-                        message_type='notification',
-                        subtype_xmlid='mail.mt_note',
-                    )
+                if task.team_id.id != (vals['team_id'] or False):
+                    team_changes.setdefault(task.team_id.id, []).append(task.id)
+        
+        # Queued before the write: the previous audience of the cards is needed
+        # to tell the users who lose access to drop them
+        if any(fname in vals for fname in KANBAN_BUS_FIELDS + KANBAN_ACCESS_FIELDS):
+            self._queue_kanban_update()
+        if any(fname in vals for fname in KANBAN_ACCESS_FIELDS):
+            # Time logs are read through the task assignee only
+            self._track_sync_access(time_logs='user_id' in vals)
+        
+        template_tasks = self.browse()
+        if TEMPLATE_USAGE_FIELDS.intersection(vals):
+            template_tasks = self.filtered('template_id')
+            template_tasks._update_template_usage(sign=-1)
         
         result = super(TaskManagement, self).write(vals)
         
+        if TEMPLATE_USAGE_FIELDS.intersection(vals):
+            (template_tasks | self.filtered('template_id'))._update_template_usage()
+        if DASHBOARD_FIELDS.intersection(vals):
+            self._invalidate_dashboard_cache()
+        
+        # Move the time logged on re-teamed tasks between team rollups
+        for old_team_id, task_ids in team_changes.items():
+            self.env['task.timesheet.rollup']._move_tasks_team(task_ids, old_team_id, vals['team_id'])
+        
+        if planned_changes:
+            self._log_planned_hours_changes(planned_changes)
+        
         # Subscribe new assigned user
-        if 'user_id' in vals:
-            for task in self:
-                if task.user_id:
-                    task.message_subscribe(partner_ids=[task.user_id.partner_id.id])
+        if 'user_id' in vals and vals['user_id']:
+            self.message_subscribe(partner_ids=self.env['res.users'].browse(vals['user_id']).partner_id.ids)
         
         return result
     
+    def _log_planned_hours_changes(self, changes):
+        """Append Planned Time changes to the log in bulk and post one batch of chatter notes
+
+        :param changes: list of (task_id, old_value, new_value)
+        """
+        now = fields.Datetime.now()
+        self.env['task.planned.hours.log'].sudo().create([{
+            'task_id': task_id,
+            'date': now,
+            'user_id': self.env.uid,
+            'old_value': old_value,
+            'new_value': new_value,
+        } for task_id, old_value, new_value in changes])
+        
+        mute = self.env['ir.config_parameter'].sudo().get_param('task_management.mute_planned_hours_chatter')
+        if mute or self.env.context.get('tracking_disable'):
+            return
+        
+        summary = self.env['task.planned.hours.log'].sudo()._get_change_summary([change[0] for change in changes])
+        bodies = {
+            task_id: Markup("""
+                <div style="padding: 12px; background-color: #fff3cd; border-left: 4px solid #ffc107; border-radius: 4px; margin: 10px 0;">
+                    <p style="margin: 0; font-weight: bold; color: #856404; font-size: 14px;">
+                        ⚠️ Planned Time Changed
+                    </p>
+                    <p style="margin: 8px 0 0 0; color: #333;">
+                        Changed from <strong style="color: #d9534f;">{:.2f} hours</strong> to <strong style="color: #5cb85c;">{:.2f} hours</strong>
+                    </p>
+                    <p style="margin: 6px 0 0 0; font-size: 12px; color: #666;">
+                        Change #{} • Changed by: {}
+                    </p>
+                </div>
+            """).format(old_value, new_value, summary.get(task_id, {}).get('count', 1), self.env.user.name)
+            for task_id, old_value, new_value in changes
+        }
+        self.browse(list(bodies))._message_log_batch(
+            bodies=bodies,
+            subtype_id=self.env['ir.model.data']._xmlid_to_res_id('mail.mt_note'),
+        )
+    
+    @instrument('task.unlink')
+    def unlink(self):
+        self._reparent_children()
+        # Time logs are deleted by the database cascade: subtract them from the rollups first
+        self.env['task.timesheet.rollup']._remove_tasks(self.ids, {task.id: task.team_id.id for task in self})
+        self._invalidate_dashboard_cache()
+        self._record_sync_tombstones()
+        self._queue_kanban_update(deleted=True)
+        self.filtered('template_id')._update_template_usage(sign=-1)
+        return super(TaskManagement, self).unlink()
+    
+    def _reparent_children(self):
+        """Move the sub-tasks of these tasks (not deleted with them) to their closest remaining ancestor"""
+        children = self.sudo().with_context(active_test=False).child_ids - self
+        children_by_parent = {}
+        for child in children:
+            parent = child.parent_id
+            while parent in self:
+                parent = parent.parent_id
+            children_by_parent.setdefault(parent.id, []).append(child.id)
+        for parent_id, child_ids in children_by_parent.items():
+            children.browse(child_ids).write({'parent_id': parent_id})
+    
     def copy(self, default=None):
         if default is None:
             default = {}
@@ -817,24 +1135,392 @@ class TaskManagement(models.Model):
     @api.returns('mail.message', lambda value: value.id)
     def message_post(self, **kwargs):
         if self.env.context.get('mark_task_as_done'):
-            stage_done = self.env['task.stage'].search([('stage_type', '=', 'done')], limit=1)
+            stage_done = self.env['task.stage']._get_stage_by_type('done')
             if stage_done:
                 self.stage_id = stage_done
         return super(TaskManagement, self).message_post(**kwargs)
     
+    def _record_sync_tombstones(self):
+        """Tombstones for these tasks and the subtasks and time logs their deletion cascades to"""
+        Tombstone = self.env['task.sync.tombstone']
+        Tombstone._record_removed(self)
+        self.env.cr.execute("SELECT id FROM task_subtask WHERE parent_task_id = ANY(%s)", [self.ids])
+        Tombstone._record_removed(self.env['task.subtask'].browse([row[0] for row in self.env.cr.fetchall()]))
+        self.env.cr.execute("SELECT id FROM task_timesheet_line WHERE task_id = ANY(%s)", [self.ids])
+        Tombstone._record_removed(self.env['task.timesheet.line'].browse([row[0] for row in self.env.cr.fetchall()]))
+    
+    def _track_sync_access(self, time_logs=False):
+        """Remember who reads these tasks and their subtasks (and time logs) before an access change"""
+        Tombstone = self.env['task.sync.tombstone']
+        tasks = self.sudo().with_context(active_test=False)
+        Tombstone._track_access(tasks)
+        Tombstone._track_access(tasks.subtask_ids)
+        if time_logs:
+            Tombstone._track_access(tasks.timesheet_ids)
+    
+    def _update_template_usage(self, sign=1):
+        """Add (or with ``sign=-1`` remove) these tasks to the usage statistics of their templates"""
+        since = fields.Datetime.now() - timedelta(days=TEMPLATE_RECENT_USAGE_DAYS)
+        deltas = {}
+        for task in self:
+            if not task.template_id:
+                continue
+            delta = deltas.setdefault(task.template_id.id, [0, 0, 0, 0.0])
+            delta[0] += sign
+            if not task.create_date or task.create_date >= since:
+                delta[1] += sign
+            if task.date_closed:
+                delta[2] += sign
+                delta[3] += sign * max((task.date_closed - (task.create_date or task.date_closed)).total_seconds() / 3600.0, 0.0)
+        if deltas:
+            self.env['task.template']._apply_usage_deltas(deltas)
+    
+    # ========== DASHBOARD ==========
+    
+    @api.model
+    def _invalidate_dashboard_cache(self):
+        """Drop the cached dashboard counters of this database once the transaction commits"""
+        dbname = self.env.cr.dbname
+        
+        def clear():
+            with _dashboard_cache_lock:
+                for key in [key for key in _dashboard_cache if key[0] == dbname]:
+                    del _dashboard_cache[key]
+        self.env.cr.postcommit.add(clear)
+    
+    @api.model
+    def _get_cached_dashboard_etag(self):
+        """ETag of the current user's cached counters, or None (no database access)"""
+        with _dashboard_cache_lock:
+            cached = _dashboard_cache.get((self.env.cr.dbname, self.env.uid))
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        return None
+    
+    @api.model
+    def get_dashboard_stats(self):
+        """
+        Return (etag, stats) with the current user's dashboard counters, served
+        from the per-user cache or computed with one grouped query.
+        """
+        key = (self.env.cr.dbname, self.env.uid)
+        now = time.monotonic()
+        with _dashboard_cache_lock:
+            cached = _dashboard_cache.get(key)
+        if cached and cached[0] > now:
+            return cached[1], cached[2]
+        
+        stats = self._compute_dashboard_stats()
+        etag = '"%s"' % hashlib.sha1(json.dumps(stats, sort_keys=True, default=str).encode()).hexdigest()
+        with _dashboard_cache_lock:
+            for expired_key in [k for k, value in _dashboard_cache.items() if value[0] <= now]:
+                del _dashboard_cache[expired_key]
+            _dashboard_cache[key] = (now + DASHBOARD_CACHE_TTL, etag, stats)
+        return etag, stats
+    
+    @api.model
+    def _compute_dashboard_stats(self):
+        """Counters of the tasks the current user can access, from one grouped query"""
+        self.flush_model(['stage_id', 'user_id', 'date_deadline', 'priority', 'active', 'team_id', 'is_closed', 'access_user_ids'])
+        today = fields.Date.context_today(self)
+        week_end = today + timedelta(days=6 - today.weekday())
+        self.env.cr.execute("""
+            SELECT t.stage_id,
+                   t.priority,
+                   COUNT(*) FILTER (WHERE t.user_id = %(uid)s),
+                   COUNT(*) FILTER (WHERE t.user_id = %(uid)s AND t.is_closed IS NOT TRUE),
+                   COUNT(*) FILTER (WHERE t.user_id = %(uid)s AND t.is_closed IS NOT TRUE
+                                      AND t.date_deadline < %(today)s),
+                   COUNT(*) FILTER (WHERE t.user_id = %(uid)s AND t.is_closed IS NOT TRUE
+                                      AND t.date_deadline BETWEEN %(today)s AND %(week_end)s),
+                   COUNT(*) FILTER (WHERE t.team_id IS NOT NULL AND t.is_closed IS NOT TRUE)
+              FROM task_management t
+             WHERE t.active
+               AND EXISTS (SELECT 1 FROM task_management_access_rel a
+                            WHERE a.task_id = t.id AND a.user_id = %(uid)s)
+          GROUP BY t.stage_id, t.priority
+        """, {'uid': self.env.uid, 'today': today, 'week_end': week_end})
+        
+        stats = {
+            'my_tasks': 0,
+            'open_tasks': 0,
+            'overdue_tasks': 0,
+            'due_this_week': 0,
+            'team_tasks': 0,
+            'by_stage': {},
+            'by_priority': {},
+        }
+        priorities = dict(self._fields['priority'].selection)
+        for stage_id, priority, mine, my_open, overdue, due_week, team_open in self.env.cr.fetchall():
+            stats['my_tasks'] += mine
+            stats['open_tasks'] += my_open
+            stats['overdue_tasks'] += overdue
+            stats['due_this_week'] += due_week
+            stats['team_tasks'] += team_open
+            if my_open:
+                stats['by_stage'][stage_id or 0] = stats['by_stage'].get(stage_id or 0, 0) + my_open
+                label = priorities.get(priority, priority)
+                stats['by_priority'][label] = stats['by_priority'].get(label, 0) + my_open
+        
+        stage_names = {
+            stage.id: stage.name
+            for stage in self.env['task.stage'].browse([stage_id for stage_id in stats['by_stage'] if stage_id])
+        }
+        stats['by_stage'] = [
+            {'stage_id': stage_id or False, 'name': stage_names.get(stage_id, _('No Stage')), 'count': count}
+            for stage_id, count in stats['by_stage'].items()
+        ]
+        return stats
+    
+    # ========== REAL-TIME KANBAN ==========
+    
+    def _queue_kanban_update(self, deleted=False):
+        """Queue these tasks for the transaction's kanban bus notification"""
+        if not self:
+            return
+        data = self.env.cr.precommit.data
+        if 'task_management.kanban' not in data:
+            data['task_management.kanban'] = {'changed': set(), 'deleted': {}, 'audience': {}}
+            self.env.cr.precommit.add(self._send_kanban_updates)
+        pending = data['task_management.kanban']
+        if deleted:
+            # Recipients must be resolved now: the access list goes away with the task
+            for task in self.sudo():
+                pending['deleted'][task.id] = task.access_user_ids.partner_id.ids
+            pending['changed'].difference_update(self.ids)
+        else:
+            # Audience before the first change of the transaction
+            for task in self.sudo():
+                if task.id not in pending['audience']:
+                    pending['audience'][task.id] = set(task.access_user_ids.partner_id.ids)
+            pending['changed'].update(self.ids)
+    
+    @api.model
+    def _send_kanban_updates(self):
+        """Send one coalesced delta per recipient for everything changed in the transaction"""
+        pending = self.env.cr.precommit.data.pop('task_management.kanban', None)
+        if not pending:
+            return
+        payloads = {}
+        tasks = self.sudo().browse(pending['changed']).exists()
+        manager_partners = self.env.ref('task_management.group_task_manager').sudo().users.partner_id
+        for task in tasks:
+            card = {
+                'id': task.id,
+                'stage_id': task.stage_id.id,
+                'user_id': task.user_id.id,
+                'priority': task.priority,
+                'date_deadline': fields.Date.to_string(task.date_deadline),
+                'kanban_state': task.kanban_state,
+            }
+            audience = task.access_user_ids.partner_id | manager_partners
+            for partner in audience:
+                payloads.setdefault(partner.id, {'tasks': [], 'deleted': [], 'removed': []})['tasks'].append(card)
+            # Users who lost access to the task (e.g. the previous assignee) drop the card
+            for partner_id in pending['audience'].get(task.id, set()) - set(audience.ids):
+                payloads.setdefault(partner_id, {'tasks': [], 'deleted': [], 'removed': []})['removed'].append(task.id)
+        for task_id, partner_ids in pending['deleted'].items():
+            for partner_id in set(partner_ids) | set(manager_partners.ids):
+                payloads.setdefault(partner_id, {'tasks': [], 'deleted': [], 'removed': []})['deleted'].append(task_id)
+        if not payloads:
+            return
+        partners = self.env['res.partner'].sudo().browse(payloads)
+        self.env['bus.bus']._sendmany([
+            (partner, 'task_management/kanban_update', self._get_kanban_bus_payload(payloads[partner.id]))
+            for partner in partners
+        ])
+    
+    @api.model
+    def _get_kanban_bus_payload(self, payload):
+        """Replace the delta of mass changes (imports, mass edits) by a reload signal"""
+        if sum(len(items) for items in payload.values()) > KANBAN_BUS_MAX_CARDS:
+            return {'reload': True}
+        return payload
+    
+    # ========== FULL-TEXT SEARCH ==========
+    
+    @api.model
+    def search_ranked(self, text, limit=20, offset=0):
+        """
+        Full-text search over task names, descriptions, subtask names and
+        time log notes, within the record rules of the current user.
+        
+        Tasks match when they (or one of their time logs visible to the user)
+        contain all the words of ``text`` (web search syntax: quotes, ``or``,
+        ``-word``) or contain it as a substring; they are ranked by relevance
+        of the task itself, so matches on time logs only come last.
+        
+        :return: [{'id', 'name', 'rank'}], best matches first
+        """
+        text = (text or '').strip()
+        if not text:
+            return []
+        self.flush_model(['search_document'])
+        TimesheetLine = self.env['task.timesheet.line']
+        TimesheetLine.flush_model(['name', 'task_id'])
+        query = self._search([])
+        task_id = SQL.identifier(query.table, 'id')
+        tsvector = SQL("to_tsvector('simple', COALESCE(%s, ''))", SQL.identifier(query.table, 'search_document'))
+        tsquery = SQL("websearch_to_tsquery('simple', %s)", text)
+        # Substring matches go through the trigram indexes of the fields
+        substring_query = self._search([('search_document', 'ilike', text)])
+        log_substring_query = TimesheetLine._search([('name', 'ilike', text)])
+        log_query = TimesheetLine._search([])
+        log_query.add_where(SQL(
+            "to_tsvector('simple', COALESCE(%s, '')) @@ %s", SQL.identifier(log_query.table, 'name'), tsquery))
+        query.add_where(SQL(
+            "(%s @@ %s OR %s IN %s OR %s IN %s OR %s IN %s)",
+            tsvector, tsquery,
+            task_id, substring_query.subselect(),
+            task_id, log_substring_query.subselect(SQL.identifier(log_substring_query.table, 'task_id')),
+            task_id, log_query.subselect(SQL.identifier(log_query.table, 'task_id')),
+        ))
+        rank = SQL("ts_rank(%s, %s)", tsvector, tsquery)
+        query.order = SQL("%s DESC, %s DESC", rank, task_id)
+        query.limit = limit
+        query.offset = offset
+        self.env.cr.execute(query.select(task_id, rank))
+        ranks = dict(self.env.cr.fetchall())
+        names = {task.id: task.name for task in self.browse(ranks)}
+        return [{'id': task_id, 'name': names[task_id], 'rank': rank} for task_id, rank in ranks.items()]
+    
+    # ========== DEADLINE NOTIFICATIONS ==========
+    
+    def init(self):
+        """Indexes backing the deadline notification and full-text search queries"""
+        tools.create_index(
+            self.env.cr,
+            'task_management_open_deadline_idx',
+            self._table,
+            ['date_deadline'],
+            where='active AND is_closed IS NOT TRUE AND date_deadline IS NOT NULL',
+        )
+        # Full-text index of the search document (the trigram index comes from the field)
+        tools.create_index(
+            self.env.cr,
+            'task_management_search_document_fts_idx',
+            self._table,
+            ["to_tsvector('simple', COALESCE(search_document, ''))"],
+            method='gin',
+        )
+    
     def _send_overdue_notifications(self):
         """Send overdue notifications for tasks"""
-        template = self.env.ref('task_management.email_template_task_overdue', raise_if_not_found=False)
-        if not template:
+        targets = self._get_deadline_notification_targets(task_ids=self.ids, reminder_days=-1)
+        self._send_deadline_digests(targets)
+    
+    @api.model
+    @instrument('task.cron_deadline_digests')
+    def _cron_send_deadline_digests(self):
+        """Cron: queue one digest per recipient for overdue and upcoming tasks"""
+        reminder_days = int(self.env['ir.config_parameter'].sudo().get_param(
+            'task_management.notification_deadline', 1) or 0)
+        targets = self._get_deadline_notification_targets(reminder_days=reminder_days)
+        self._send_deadline_digests(targets)
+        _logger.info('Deadline digests: %s notification(s) queued', len(targets))
+    
+    @api.model
+    def _get_deadline_notification_targets(self, task_ids=None, reminder_days=1):
+        """
+        Find open tasks that are overdue or due within ``reminder_days`` and
+        were not notified yet for their current deadline, in one indexed query.
+        Team tasks without an assignee notify the team manager.
+        
+        :return: list of (task_id, user_id, kind, deadline)
+        """
+        self.flush_model(['active', 'is_closed', 'date_deadline', 'user_id', 'team_id'])
+        self.env['task.team'].flush_model(['manager_id'])
+        self.env['task.notification.log'].flush_model()
+        
+        today = fields.Date.context_today(self)
+        query = """
+            SELECT target.task_id, target.user_id, target.kind, target.deadline
+              FROM (
+                    SELECT t.id AS task_id,
+                           COALESCE(t.user_id, team.manager_id) AS user_id,
+                           CASE WHEN t.date_deadline < %(today)s THEN 'overdue' ELSE 'reminder' END AS kind,
+                           t.date_deadline AS deadline
+                      FROM task_management t
+                 LEFT JOIN task_team team ON team.id = t.team_id
+                     WHERE t.active
+                       AND t.is_closed IS NOT TRUE
+                       AND t.date_deadline IS NOT NULL
+                       AND t.date_deadline <= %(limit)s
+                       {task_filter}
+                   ) AS target
+             WHERE target.user_id IS NOT NULL
+               AND NOT EXISTS (
+                    SELECT 1
+                      FROM task_notification_log log
+                     WHERE log.task_id = target.task_id
+                       AND log.user_id = target.user_id
+                       AND log.kind = target.kind
+                       AND log.deadline = target.deadline
+               )
+          ORDER BY target.user_id, target.deadline, target.task_id
+        """.format(task_filter='AND t.id = ANY(%(task_ids)s)' if task_ids is not None else '')
+        self.env.cr.execute(query, {
+            'today': today,
+            'limit': today + timedelta(days=reminder_days),
+            'task_ids': list(task_ids or []),
+        })
+        return self.env.cr.fetchall()
+    
+    @api.model
+    def _send_deadline_digests(self, targets):
+        """
+        Queue a single digest email per recipient, post the chatter notes in
+        one batch and remember what was sent.
+        
+        :param targets: list of (task_id, user_id, kind, deadline)
+        """
+        if not targets:
             return
-            
-        for task in self:
-            template.send_mail(task.id, force_send=True)
-            task.message_post(
-                body=_('Task is overdue. Notification sent to %s') % task.user_id.name,
-                message_type='notification',
-            )
-
+        
+        tasks_by_user = {}
+        for task_id, user_id, kind, deadline in targets:
+            tasks_by_user.setdefault(user_id, {'overdue': [], 'reminder': []})[kind].append(task_id)
+        
+        Task = self.sudo()
+        users = self.env['res.users'].sudo().browse(list(tasks_by_user))
+        email_from = self.env.company.email_formatted or self.env.user.email_formatted
+        mail_values = []
+        for user in users:
+            grouped = tasks_by_user[user.id]
+            body = self.env['ir.qweb'].with_context(lang=user.lang)._render(
+                'task_management.task_deadline_digest', {
+                    'user': user,
+                    'overdue_tasks': Task.browse(grouped['overdue']),
+                    'upcoming_tasks': Task.browse(grouped['reminder']),
+                })
+            mail_values.append({
+                'subject': _('Task deadlines: %(overdue)s overdue, %(upcoming)s upcoming',
+                             overdue=len(grouped['overdue']), upcoming=len(grouped['reminder'])),
+                'body_html': body,
+                'email_from': email_from,
+                'recipient_ids': [(4, user.partner_id.id)],
+                'auto_delete': True,
+            })
+        # Queued only: the mail queue cron delivers them
+        self.env['mail.mail'].sudo().create(mail_values)
+        
+        user_names = {user.id: user.name for user in users}
+        bodies = {}
+        for task_id, user_id, kind, deadline in targets:
+            if kind == 'overdue':
+                note = _('Task is overdue. Notification sent to %s', user_names[user_id])
+            else:
+                note = _('Deadline reminder sent to %s', user_names[user_id])
+            bodies[task_id] = Markup('%s<br/>%s') % (bodies[task_id], note) if task_id in bodies else note
+        Task.browse(list(bodies))._message_log_batch(bodies=bodies)
+        
+        self.env['task.notification.log'].sudo().create([{
+            'task_id': task_id,
+            'user_id': user_id,
+            'kind': kind,
+            'deadline': deadline,
+        } for task_id, user_id, kind, deadline in targets])
+    
     def get_time_tracking_summary(self):
         """Get detailed time tracking summary for the task"""
         self.ensure_one()
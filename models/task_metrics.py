@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+In-process timing and query-count histograms for the module's hot paths.
+
+Enabled with ``task_management_metrics = True`` in the server configuration
+file. When disabled, ``instrument`` returns the decorated function untouched,
+so there is no overhead at all. Metrics are per worker process.
+
+The ``/task_management/metrics`` endpoint is only served when
+``task_management_metrics_token`` is also set: scrapers must send it as an
+``Authorization: Bearer <token>`` header.
+"""
+
+from odoo.tools import config
+import functools
+import threading
+import time
+
+METRICS_ENABLED = str(config.get('task_management_metrics', '')).lower() in ('1', 'true', 'yes')
+METRICS_TOKEN = config.get('task_management_metrics_token') or ''
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# operation -> {'buckets': [count per bucket], 'count', 'sum', 'queries'}
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def observe(operation, duration, queries=0):
+    """Record one run of ``operation``"""
+    with _histograms_lock:
+        histogram = _histograms.get(operation)
+        if histogram is None:
+            histogram = _histograms[operation] = {
+                'buckets': [0] * len(DURATION_BUCKETS), 'count': 0, 'sum': 0.0, 'queries': 0,
+            }
+        for index, bound in enumerate(DURATION_BUCKETS):
+            if duration <= bound:
+                histogram['buckets'][index] += 1
+        histogram['count'] += 1
+        histogram['sum'] += duration
+        histogram['queries'] += queries
+
+
+def instrument(operation):
+    """
+    Decorator timing a model method or controller route and counting its
+    queries under ``operation``. Place it closest to the ``def``, below the
+    ``api`` or ``http.route`` decorators.
+    """
+    def decorator(func):
+        if not METRICS_ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            env = getattr(self, 'env', None)
+            if env is None:
+                from odoo.http import request
+                env = request.env
+            cr = env.cr
+            queries = cr.sql_log_count
+            started = time.perf_counter()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                observe(operation, time.perf_counter() - started, cr.sql_log_count - queries)
+        return wrapper
+    return decorator
+
+
+def render_prometheus():
+    """Return the histograms in the Prometheus text exposition format"""
+    with _histograms_lock:
+        histograms = {operation: dict(values, buckets=list(values['buckets'])) for operation, values in _histograms.items()}
+    lines = [
+        '# HELP task_management_duration_seconds Duration of task management operations.',
+        '# TYPE task_management_duration_seconds histogram',
+    ]
+    for operation, histogram in sorted(histograms.items()):
+        for bound, count in zip(DURATION_BUCKETS, histogram['buckets']):
+            lines.append('task_management_duration_seconds_bucket{operation="%s",le="%s"} %d' % (operation, bound, count))
+        lines.append('task_management_duration_seconds_bucket{operation="%s",le="+Inf"} %d' % (operation, histogram['count']))
+        lines.append('task_management_duration_seconds_sum{operation="%s"} %.6f' % (operation, histogram['sum']))
+        lines.append('task_management_duration_seconds_count{operation="%s"} %d' % (operation, histogram['count']))
+    lines += [
+        '# HELP task_management_queries_total SQL queries run by task management operations.',
+        '# TYPE task_management_queries_total counter',
+    ]
+    for operation, histogram in sorted(histograms.items()):
+        lines.append('task_management_queries_total{operation="%s"} %d' % (operation, histogram['queries']))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields
+
+
+class TaskNotificationLog(models.Model):
+    """Deadline notifications already queued, so digest runs are idempotent"""
+    _name = 'task.notification.log'
+    _description = 'Task Deadline Notification Log'
+    _order = 'date desc, id desc'
+    _rec_name = 'task_id'
+    _log_access = False
+
+    task_id = fields.Many2one(
+        'task.management',
+        string='Task',
+        required=True,
+        ondelete='cascade',
+        index=True
+    )
+
+    user_id = fields.Many2one(
+        'res.users',
+        string='Recipient',
+        required=True,
+        ondelete='cascade'
+    )
+
+    kind = fields.Selection([
+        ('reminder', 'Deadline Reminder'),
+        ('overdue', 'Overdue'),
+    ], string='Notification', required=True)
+
+    # A new notification is due when the deadline moves
+    deadline = fields.Date(string='Deadline', required=True)
+
+    date = fields.Datetime(string='Sent On', required=True, default=fields.Datetime.now)
+
+    _sql_constraints = [
+        ('task_user_kind_deadline_uniq', 'unique (task_id, user_id, kind, deadline)',
+         'This deadline notification has already been sent!'),
+    ]
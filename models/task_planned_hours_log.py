@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import UserError
+
+
+class TaskPlannedHoursLog(models.Model):
+    """Append-only log of Planned Time changes (one compact row per change)"""
+    _name = 'task.planned.hours.log'
+    _description = 'Planned Time Change Log'
+    _order = 'date desc, id desc'
+    _rec_name = 'task_id'
+    _log_access = False
+
+    task_id = fields.Many2one(
+        'task.management',
+        string='Task',
+        required=True,
+        ondelete='cascade',
+        readonly=True
+    )
+
+    date = fields.Datetime(
+        string='Changed On',
+        required=True,
+        default=fields.Datetime.now,
+        readonly=True
+    )
+
+    user_id = fields.Many2one(
+        'res.users',
+        string='Changed By',
+        default=lambda self: self.env.user,
+        readonly=True
+    )
+
+    old_value = fields.Float(string='Previous Planned Time', readonly=True)
+    new_value = fields.Float(string='New Planned Time', readonly=True)
+
+    def init(self):
+        """Index the log for per-task, most-recent-first lookups"""
+        tools.create_index(
+            self.env.cr,
+            'task_planned_hours_log_task_id_date_idx',
+            self._table,
+            ['task_id', 'date DESC', 'id DESC'],
+        )
+
+    def write(self, vals):
+        raise UserError(_('Planned Time change logs cannot be modified.'))
+
+    @api.model
+    def _get_change_summary(self, task_ids):
+        """
+        Return {task_id: {'count', 'last_date', 'last_user_id'}} for the given
+        tasks from a single grouped query over the log.
+        """
+        task_ids = [task_id for task_id in task_ids if task_id]
+        if not task_ids:
+            return {}
+        self.flush_model(['task_id', 'date', 'user_id'])
+        self.env.cr.execute("""
+            SELECT DISTINCT ON (task_id)
+                   task_id,
+                   COUNT(*) OVER (PARTITION BY task_id),
+                   date,
+                   user_id
+              FROM task_planned_hours_log
+             WHERE task_id = ANY(%s)
+          ORDER BY task_id, date DESC, id DESC
+        """, [task_ids])
+        return {
+            task_id: {'count': count, 'last_date': last_date, 'last_user_id': user_id}
+            for task_id, count, last_date, user_id in self.env.cr.fetchall()
+        }
@@ -1,12 +1,26 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api, _
-from dateutil.relativedelta import relativedelta
-from datetime import datetime, timedelta
+from odoo import models, fields, api, tools, _
+from .task_metrics import instrument
+from dateutil import rrule
+from datetime import datetime
+import heapq
+import itertools
 import logging
+import time
 
 _logger = logging.getLogger(__name__)
 
+WEEKDAY_FIELDS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+RRULE_WEEKDAYS = (rrule.MO, rrule.TU, rrule.WE, rrule.TH, rrule.FR, rrule.SA, rrule.SU)
+RRULE_FREQUENCIES = {
+    'daily': rrule.DAILY,
+    'weekly': rrule.WEEKLY,
+    'monthly': rrule.MONTHLY,
+    'yearly': rrule.YEARLY,
+    'custom': rrule.DAILY,
+}
+
 
 class TaskRecurrence(models.Model):
     _name = 'task.recurrence'
@@ -75,7 +89,13 @@ class TaskRecurrence(models.Model):
     task_ids = fields.One2many('task.management', 'recurrence_id', string='Tasks')
     task_count = fields.Integer(string='Task Count', compute='_compute_task_count', store=True)
     
-    next_recurrence_date = fields.Date(string='Next Recurrence Date', compute='_compute_next_date', store=True)
+    next_recurrence_date = fields.Date(
+        string='Next Recurrence Date',
+        compute='_compute_next_date',
+        store=True,
+        index=True,
+        help='Date of the next occurrence to create, empty once the recurrence has ended'
+    )
     
     @api.depends('recurrence_type', 'interval')
     def _compute_name(self):
@@ -93,49 +113,164 @@ class TaskRecurrence(models.Model):
     
     @api.depends('task_ids')
     def _compute_task_count(self):
+        groups = self.env['task.management']._read_group(
+            [('recurrence_id', 'in', [rec_id for rec_id in self.ids if rec_id])],
+            ['recurrence_id'],
+            ['__count'],
+        )
+        counts = {rec.id: count for rec, count in groups}
         for rec in self:
-            rec.task_count = len(rec.task_ids)
+            rec.task_count = counts.get(rec.id, 0)
     
-    @api.depends('task_ids', 'task_ids.date_deadline')
+    @api.depends('task_ids', 'task_ids.date_deadline', 'recurrence_type', 'interval',
+                 'mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun',
+                 'month_by', 'day', 'week_list', 'weekday',
+                 'end_type', 'count', 'end_date')
     def _compute_next_date(self):
+        bounds = self._get_deadline_bounds()
         for rec in self:
-            if rec.task_ids:
-                tasks_with_deadline = rec.task_ids.filtered('date_deadline')
-                if tasks_with_deadline:
-                    last_task = tasks_with_deadline.sorted('date_deadline', reverse=True)[0]
-                    rec.next_recurrence_date = rec._get_next_recurrence_date(last_task.date_deadline)
-                else:
-                    rec.next_recurrence_date = fields.Date.today()
+            first_deadline, last_deadline = bounds.get(rec.id, (None, None))
+            # Occurrences are copied from the last task: a rule without any
+            # dated task has nothing to create and stays out of the queue
+            next_date = rec._get_next_recurrence_date(last_deadline, dtstart=first_deadline) if last_deadline else None
+            # Ended recurrences drop out of the scheduler's due index
+            rec.next_recurrence_date = next_date if next_date and rec._should_create_next_task(next_date) else False
+    
+    def _get_deadline_bounds(self):
+        """Return {recurrence_id: (first, last) task deadline} from one grouped query"""
+        groups = self.env['task.management']._read_group(
+            [('recurrence_id', 'in', [rec_id for rec_id in self.ids if rec_id]), ('date_deadline', '!=', False)],
+            ['recurrence_id'],
+            ['date_deadline:min', 'date_deadline:max'],
+        )
+        return {rec.id: (first, last) for rec, first, last in groups}
+    
+    def _get_last_task(self):
+        """Return the task with the latest deadline, used as template for the next ones"""
+        self.ensure_one()
+        return self.env['task.management'].search([
+            ('recurrence_id', '=', self.id),
+            ('date_deadline', '!=', False),
+        ], order='date_deadline desc, id desc', limit=1)
+    
+    # ========== RECURRENCE ENGINE ==========
+    
+    def _get_rule_key(self):
+        """Hashable snapshot of every field that shapes the occurrences"""
+        self.ensure_one()
+        return (
+            self.recurrence_type,
+            self.interval,
+            tuple(bool(self[fname]) for fname in WEEKDAY_FIELDS),
+            self.month_by,
+            self.day,
+            self.week_list,
+            self.weekday,
+            self.end_type,
+            self.count,
+            self.end_date,
+        )
+    
+    @api.model
+    @tools.ormcache('rule_key', 'dtstart')
+    def _compile_rrule(self, rule_key, dtstart):
+        """Compile a rule key into a dateutil rrule anchored on ``dtstart`` (cached)"""
+        (recurrence_type, interval, weekdays, month_by, day,
+         week_list, weekday, end_type, count, end_date) = rule_key
+        freq = RRULE_FREQUENCIES.get(recurrence_type, rrule.DAILY)
+        kwargs = {
+            'dtstart': datetime.combine(dtstart, datetime.min.time()),
+            'interval': max(interval or 1, 1),
+        }
+        
+        byweekday = [RRULE_WEEKDAYS[index] for index, flag in enumerate(weekdays) if flag]
+        if freq in (rrule.WEEKLY, rrule.DAILY) and byweekday:
+            kwargs['byweekday'] = byweekday
+        elif freq == rrule.MONTHLY:
+            if month_by == 'day' and week_list and weekday:
+                # e.g. "last Friday of the month" -> FR(-1)
+                kwargs['byweekday'] = RRULE_WEEKDAYS[int(weekday)](int(week_list))
             else:
-                rec.next_recurrence_date = fields.Date.today()
+                month_day = min(max(day or 1, 1), 31)
+                if month_day > 28:
+                    # Clamp to the last day of shorter months instead of skipping them
+                    kwargs['bymonthday'] = tuple(range(28, month_day + 1))
+                    kwargs['bysetpos'] = -1
+                else:
+                    kwargs['bymonthday'] = month_day
+        
+        if end_type == 'count':
+            kwargs['count'] = max(count or 0, 1)
+        elif end_type == 'end_date' and end_date:
+            kwargs['until'] = datetime.combine(end_date, datetime.max.time())
+        
+        return rrule.rrule(freq, **kwargs)
     
-    def _get_next_recurrence_date(self, current_date):
-        """Calculate the next recurrence date based on rules"""
+    def _get_rrule(self, dtstart=None):
+        """Return the compiled rule, anchored on the first task deadline by default"""
+        self.ensure_one()
+        if not dtstart:
+            dtstart = self._get_deadline_bounds().get(self.id, (None, None))[0]
+        if not dtstart:
+            dtstart = self.create_date.date() if self.create_date else fields.Date.today()
+        if isinstance(dtstart, datetime):
+            dtstart = dtstart.date()
+        return self._compile_rrule(self._get_rule_key(), dtstart)
+    
+    def _get_next_recurrence_date(self, current_date, dtstart=None):
+        """Calculate the next occurrence strictly after ``current_date``, or None once ended"""
         if isinstance(current_date, datetime):
             current_date = current_date.date()
         
-        if self.recurrence_type == 'daily':
-            return current_date + timedelta(days=self.interval)
-        elif self.recurrence_type == 'weekly':
-            return current_date + timedelta(weeks=self.interval)
-        elif self.recurrence_type == 'monthly':
-            return current_date + relativedelta(months=self.interval)
-        elif self.recurrence_type == 'yearly':
-            return current_date + relativedelta(years=self.interval)
+        occurrence = self._get_rrule(dtstart).after(
+            datetime.combine(current_date, datetime.min.time()))
+        return occurrence.date() if occurrence else None
+    
+    def _iter_occurrences(self, date_from, date_to):
+        """
+        Lazily yield (recurrence, date) for every occurrence of these rules
+        between two dates (inclusive), in chronological order, without
+        creating any task.
+        """
+        bounds = self._get_deadline_bounds()
+        start = datetime.combine(date_from, datetime.min.time())
+        stop = datetime.combine(date_to, datetime.max.time())
+        
+        def stream(rec):
+            rule = rec._get_rrule(bounds.get(rec.id, (None, None))[0])
+            for occurrence in itertools.takewhile(lambda dt: dt <= stop, rule.xafter(start, inc=True)):
+                yield occurrence.date(), rec.id
         
-        return current_date
+        for day, rec_id in heapq.merge(*(stream(rec) for rec in self)):
+            yield self.browse(rec_id), day
     
-    def _should_create_next_task(self):
+    def _should_create_next_task(self, next_date=None):
         """Check if next task should be created based on end conditions"""
+        if next_date is None:
+            next_date = self.next_recurrence_date
         if self.end_type == 'forever':
             return True
         elif self.end_type == 'count':
-            return len(self.task_ids) < self.count
+            return self.task_count < self.count
         elif self.end_type == 'end_date':
-            next_date = self.next_recurrence_date
-            return next_date and next_date <= self.end_date
+            return bool(next_date and self.end_date and next_date <= self.end_date)
         return False
     
+    def _prepare_occurrence_values(self, template_values, last_task, deadline):
+        """Values of the task created for the occurrence due on ``deadline``"""
+        if last_task.date_start and last_task.date_deadline:
+            date_start = deadline - (last_task.date_deadline - last_task.date_start)
+        else:
+            date_start = deadline
+        return dict(
+            template_values,
+            name=last_task.name,
+            date_deadline=deadline,
+            date_start=min(date_start, deadline),
+            stage_id=self.env['task.stage']._get_stage_by_type('new').id,
+            recurrence_id=self.id,
+        )
+    
     def create_next_task(self):
         """Create the next task in the recurrence series"""
         self.ensure_one()
@@ -143,31 +278,76 @@ class TaskRecurrence(models.Model):
             return False
         
         # Get the last task as template
-        tasks_with_deadline = self.task_ids.filtered('date_deadline')
-        last_task = tasks_with_deadline.sorted('date_deadline', reverse=True)[0] if tasks_with_deadline else False
-        
+        last_task = self._get_last_task()
         if last_task:
             # Calculate new deadline
             new_deadline = self._get_next_recurrence_date(last_task.date_deadline or fields.Date.today())
-            
-            # Copy task with new values
-            new_task = last_task.copy({
-                'name': last_task.name,
-                'date_deadline': new_deadline,
-                'date_start': fields.Datetime.now(),
-                'stage_id': self.env['task.stage'].search([('stage_type', '=', 'new')], limit=1).id,
-                'recurrence_id': self.id,
-                'progress': 0,
-            })
+            if not new_deadline:
+                return False
+            template_values = last_task.copy_data()[0]
+            new_task = self.env['task.management'].create(
+                self._prepare_occurrence_values(template_values, last_task, new_deadline))
             
             _logger.info('Created recurring task: %s', new_task.name)
             return new_task
         return False
     
+    def _create_missed_tasks(self, until):
+        """Create every occurrence due up to ``until`` (catch-up) in a single batch"""
+        self.ensure_one()
+        Task = self.env['task.management']
+        last_task = self._get_last_task()
+        if not last_task:
+            return Task
+        
+        template_values = last_task.copy_data()[0]
+        remaining = self.count - self.task_count if self.end_type == 'count' else None
+        rule = self._get_rrule()
+        vals_list = [
+            self._prepare_occurrence_values(template_values, last_task, occurrence.date())
+            for occurrence in itertools.takewhile(
+                lambda dt: dt.date() <= until,
+                rule.xafter(datetime.combine(last_task.date_deadline, datetime.max.time())),
+            )
+        ]
+        if remaining is not None:
+            vals_list = vals_list[:max(remaining, 0)]
+        
+        return Task.create(vals_list) if vals_list else Task
+    
     @api.model
-    def _cron_create_recurring_tasks(self):
-        """Cron job to create recurring tasks"""
-        recurrences = self.search([])
-        for rec in recurrences:
-            if rec._should_create_next_task():
-                rec.create_next_task()
\ No newline at end of file
+    @instrument('recurrence.cron_create_tasks')
+    def _cron_create_recurring_tasks(self, batch_size=100):
+        """
+        Cron job to create recurring tasks.
+        Only due rules are selected (indexed next_recurrence_date) and each batch
+        is claimed with FOR UPDATE SKIP LOCKED, so parallel workers never pick
+        the same rule; every missed occurrence up to today is created at once.
+        """
+        started = time.perf_counter()
+        today = fields.Date.context_today(self)
+        self.flush_model(['next_recurrence_date'])
+        processed_ids = []
+        created = 0
+        while True:
+            self.env.cr.execute("""
+                SELECT id
+                  FROM task_recurrence
+                 WHERE next_recurrence_date <= %s
+                   AND id != ALL(%s)
+              ORDER BY next_recurrence_date, id
+                 LIMIT %s
+                   FOR UPDATE SKIP LOCKED
+            """, [today, processed_ids, batch_size])
+            rule_ids = [row[0] for row in self.env.cr.fetchall()]
+            if not rule_ids:
+                break
+            for rec in self.browse(rule_ids):
+                created += len(rec._create_missed_tasks(today))
+            processed_ids.extend(rule_ids)
+            self.env.flush_all()
+        
+        _logger.info(
+            'Recurring tasks: %s due rule(s) processed, %s task(s) created in %.2fs',
+            len(processed_ids), created, time.perf_counter() - started,
+        )
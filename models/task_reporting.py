@@ -1,11 +1,74 @@
 # -*- coding: utf-8 -*-
 
 from odoo import models, fields, api, tools, _
+from odoo.exceptions import AccessError
+from odoo.tools.sql import TableKind, table_kind
+from .task_metrics import instrument
+import hashlib
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class TaskMaterializedReport(models.AbstractModel):
+    """Reports stored as materialized views, refreshed concurrently"""
+    _name = 'task.materialized.report'
+    _description = 'Materialized Report Mixin'
+    _auto = False
+
+    # Columns indexed on the materialized view (besides the unique id)
+    _report_indexes = ()
+
+    def _report_query(self):
+        """SELECT statement materialized for this report; rows need a stable, unique id"""
+        raise NotImplementedError()
+
+    def init(self):
+        """Create the materialized view with its supporting indexes, unless its definition is unchanged"""
+        if self._abstract:
+            return
+        query = self._report_query()
+        signature = hashlib.sha1(repr((query, self._report_indexes)).encode()).hexdigest()
+        if table_kind(self.env.cr, self._table) == TableKind.Materialized:
+            # The signature of the definition is kept as the comment of the view
+            self.env.cr.execute("SELECT obj_description(%s::regclass, 'pg_class')", [self._table])
+            if self.env.cr.fetchone()[0] == signature:
+                return
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute("CREATE MATERIALIZED VIEW %s AS (%s)" % (self._table, query))
+        self.env.cr.execute("COMMENT ON MATERIALIZED VIEW %s IS %%s" % self._table, [signature])
+        # A unique index is required to refresh CONCURRENTLY
+        self.env.cr.execute("CREATE UNIQUE INDEX %s_id_idx ON %s (id)" % (self._table, self._table))
+        for column in self._report_indexes:
+            self.env.cr.execute("CREATE INDEX %s_%s_idx ON %s (%s)" % (self._table, column, self._table, column))
+
+    def _refresh_report(self):
+        """Refresh the materialized view without blocking readers"""
+        self.env.flush_all()
+        self.env.cr.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY %s" % self._table)
+        self.invalidate_model()
+
+    @api.model
+    @instrument('report.cron_refresh')
+    def _cron_refresh_reports(self):
+        """Cron: refresh every materialized task report"""
+        for model_name in ('task.report', 'task.subtask.report'):
+            self.env[model_name]._refresh_report()
+        _logger.info('Task reports refreshed')
+
+    @api.model
+    def action_refresh_report(self):
+        """Refresh on demand from the report views (managers only: a refresh rebuilds the whole report)"""
+        if not self.env.user.has_group('task_management.group_task_manager'):
+            raise AccessError(_('Only task managers can refresh the reports.'))
+        self._refresh_report()
+        return {'type': 'ir.actions.client', 'tag': 'reload'}
 
 
 class TaskReport(models.Model):
-    """Task Analysis Report - Clean & Focused"""
+    """Task Analysis Report - Clean & Focused (one row per task)"""
     _name = 'task.report'
+    _inherit = 'task.materialized.report'
     _description = 'Task Analysis Report'
     _auto = False
     _rec_name = 'task_id'
@@ -19,10 +82,6 @@ class TaskReport(models.Model):
         ('team', 'Team Task')
     ], string='Task Type', readonly=True)
     
-    # Subtask Information
-    subtask_id = fields.Many2one('task.subtask', string='Subtask', readonly=True)
-    subtask_name = fields.Char(string='Subtask Name', readonly=True)
-    
     # Assignment
     user_id = fields.Many2one('res.users', string='Assigned To', readonly=True)
     team_id = fields.Many2one('task.team', string='Team', readonly=True)
@@ -73,18 +132,16 @@ class TaskReport(models.Model):
     # Company
     company_id = fields.Many2one('res.company', string='Company', readonly=True)
 
-    def init(self):
-        """Create optimized view for task analysis"""
-        tools.drop_view_if_exists(self.env.cr, self._table)
-        query = """
-            CREATE OR REPLACE VIEW %s AS (
+    _report_indexes = ('task_id', 'user_id', 'team_id', 'stage_id', 'date')
+
+    def _report_query(self):
+        """Task grain: one row per task, id is the task id (stable across refreshes)"""
+        return """
                 SELECT
-                    ROW_NUMBER() OVER (ORDER BY t.id, st.id) as id,
+                    t.id as id,
                     t.id as task_id,
                     t.name as name,
                     t.task_type as task_type,
-                    st.id as subtask_id,
-                    st.name as subtask_name,
                     t.user_id as user_id,
                     t.team_id as team_id,
                     t.create_uid as create_uid,
@@ -106,7 +163,7 @@ class TaskReport(models.Model):
                     t.subtask_count as subtask_count,
                     t.subtask_completed_count as subtask_completed_count,
                     
-                    -- Computed
+                    -- Computed (as of the last refresh)
                     CASE
                         WHEN t.date_deadline < CURRENT_DATE AND COALESCE(ts.is_closed, False) = False 
                         THEN True ELSE False
@@ -127,11 +184,8 @@ class TaskReport(models.Model):
                     
                 FROM task_management t
                 LEFT JOIN task_stage ts ON t.stage_id = ts.id
-                LEFT JOIN task_subtask st ON st.parent_task_id = t.id
                 WHERE t.active = True
-            )
-        """ % self._table
-        self.env.cr.execute(query)
+        """
     
     def action_open_task(self):
         """Open task form"""
@@ -146,29 +200,123 @@ class TaskReport(models.Model):
         }
 
 
+class TaskSubtaskReport(models.Model):
+    """Subtask Analysis Report (one row per subtask)"""
+    _name = 'task.subtask.report'
+    _inherit = 'task.materialized.report'
+    _description = 'Subtask Analysis Report'
+    _auto = False
+    _rec_name = 'subtask_id'
+    _order = 'date desc'
+
+    # Subtask Information
+    subtask_id = fields.Many2one('task.subtask', string='Subtask', readonly=True)
+    subtask_name = fields.Char(string='Subtask Name', readonly=True)
+    user_id = fields.Many2one('res.users', string='Assigned To', readonly=True)
+    is_done = fields.Boolean(string='Done', readonly=True)
+    deadline = fields.Date(string='Deadline', readonly=True)
+    
+    # Parent Task Context
+    task_id = fields.Many2one('task.management', string='Task', readonly=True)
+    task_name = fields.Char(string='Task Name', readonly=True)
+    task_type = fields.Selection([
+        ('individual', 'Individual Task'),
+        ('team', 'Team Task')
+    ], string='Task Type', readonly=True)
+    team_id = fields.Many2one('task.team', string='Team', readonly=True)
+    stage_id = fields.Many2one('task.stage', string='Stage', readonly=True)
+    priority = fields.Selection([
+        ('0', 'Low'),
+        ('1', 'Normal'),
+        ('2', 'High'),
+        ('3', 'Urgent')
+    ], string='Priority', readonly=True)
+    date = fields.Date(string='Date', readonly=True)
+    
+    # Time Tracking - from the time logs of this subtask
+    planned_hours = fields.Float(string='Planned Hours', readonly=True)
+    logged_hours = fields.Float(string='Logged Hours', readonly=True)
+    
+    # Computed Metrics
+    is_overdue = fields.Boolean(string='Is Overdue', readonly=True)
+    
+    # Company
+    company_id = fields.Many2one('res.company', string='Company', readonly=True)
+
+    _report_indexes = ('task_id', 'user_id', 'team_id', 'date')
+
+    def _report_query(self):
+        """Subtask grain: one row per subtask, id is the subtask id (stable across refreshes)"""
+        return """
+                SELECT
+                    st.id as id,
+                    st.id as subtask_id,
+                    st.name as subtask_name,
+                    st.user_id as user_id,
+                    COALESCE(st.is_done, False) as is_done,
+                    st.deadline as deadline,
+                    
+                    -- Parent Task Context
+                    t.id as task_id,
+                    t.name as task_name,
+                    t.task_type as task_type,
+                    t.team_id as team_id,
+                    t.stage_id as stage_id,
+                    t.priority as priority,
+                    t.date_start as date,
+                    
+                    -- Time Tracking (pre-aggregated, one row per subtask)
+                    COALESCE(tl.planned_hours, 0.0) as planned_hours,
+                    COALESCE(tl.logged_hours, 0.0) as logged_hours,
+                    
+                    -- Computed (as of the last refresh)
+                    CASE
+                        WHEN COALESCE(st.deadline, t.date_deadline) < CURRENT_DATE AND COALESCE(st.is_done, False) = False
+                        THEN True ELSE False
+                    END as is_overdue,
+                    
+                    t.company_id as company_id
+                    
+                FROM task_subtask st
+                JOIN task_management t ON st.parent_task_id = t.id
+                LEFT JOIN (
+                    SELECT subtask_id,
+                           SUM(planned_hours) as planned_hours,
+                           SUM(unit_amount) as logged_hours
+                      FROM task_timesheet_line
+                  GROUP BY subtask_id
+                ) tl ON tl.subtask_id = st.id
+                WHERE t.active = True
+        """
+    
+    def action_open_task(self):
+        """Open parent task form"""
+        self.ensure_one()
+        return {
+            'name': self.task_name,
+            'type': 'ir.actions.act_window',
+            'res_model': 'task.management',
+            'res_id': self.task_id.id,
+            'view_mode': 'form',
+            'target': 'current',
+        }
+
+
 class TimesheetReport(models.Model):
-    """Time Log Summary Report - Clean & Focused"""
+    """Time Log Summary Report - one row per task, subtask, employee and day"""
     _name = 'timesheet.report'
     _description = 'Time Log Summary'
     _auto = False
     _rec_name = 'id'
     _order = 'date desc'
 
-    # Time Log Entry
-    timesheet_id = fields.Many2one('task.timesheet.line', string='Time Log', readonly=True)
     date = fields.Date(string='Date', readonly=True)
     
-    # Status
-    status = fields.Selection([
-        ('in_progress', 'In Progress'),
-        ('in_review', 'In Review'),
-        ('done', 'Done')
-    ], string='Status', readonly=True)
-    
     # Time Tracking
     planned_hours = fields.Float(string='Planned Hours', readonly=True)
     unit_amount = fields.Float(string='Actual Hours', readonly=True)
     remaining_hours = fields.Float(string='Remaining Hours', readonly=True)
+    entry_count = fields.Integer(string='# Time Logs', readonly=True)
     
     # Assignment
     user_id = fields.Many2one('res.users', string='Employee', readonly=True)
@@ -197,42 +345,42 @@ class TimesheetReport(models.Model):
     company_id = fields.Many2one('res.company', string='Company', readonly=True)
 
     def init(self):
-        """Create optimized view for time log analysis"""
+        """Create the view over the task x day time log rollup"""
         tools.drop_view_if_exists(self.env.cr, self._table)
         query = """
             CREATE OR REPLACE VIEW %s AS (
                 SELECT
-                    tl.id as id,
-                    tl.id as timesheet_id,
-                    tl.date as date,
-                    tl.status as status,
-                    tl.planned_hours as planned_hours,
-                    tl.unit_amount as unit_amount,
-                    tl.remaining_hours as remaining_hours,
-                    tl.user_id as user_id,
+                    r.id as id,
+                    r.date as date,
+                    r.planned_hours as planned_hours,
+                    r.unit_amount as unit_amount,
+                    r.planned_hours - r.unit_amount as remaining_hours,
+                    r.entry_count as entry_count,
+                    NULLIF(r.user_id, 0) as user_id,
                     
                     -- Task Context
-                    tl.task_id as task_id,
+                    r.task_id as task_id,
                     t.name as task_name,
                     t.task_type as task_type,
                     
                     -- Subtask
-                    tl.subtask_id as subtask_id,
+                    NULLIF(r.subtask_id, 0) as subtask_id,
                     ts.name as subtask_name,
                     
                     -- Team
                     t.team_id as team_id,
                     
                     -- Date Grouping
-                    TO_CHAR(tl.date, 'YYYY-MM') as date_month,
-                    TO_CHAR(tl.date, 'IYYY-IW') as date_week,
-                    TO_CHAR(tl.date, 'YYYY') as date_year,
+                    TO_CHAR(r.date, 'YYYY-MM') as date_month,
+                    TO_CHAR(r.date, 'IYYY-IW') as date_week,
+                    TO_CHAR(r.date, 'YYYY') as date_year,
                     
-                    tl.company_id as company_id
+                    t.company_id as company_id
                     
-                FROM task_timesheet_line tl
-                LEFT JOIN task_management t ON tl.task_id = t.id
-                LEFT JOIN task_subtask ts ON tl.subtask_id = ts.id
+                FROM task_timesheet_rollup_task_day r
+                JOIN task_management t ON r.task_id = t.id
+                LEFT JOIN task_subtask ts ON r.subtask_id = ts.id
+                WHERE r.entry_count > 0
             )
         """ % self._table
         self.env.cr.execute(query)
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
 
 
 class TaskStage(models.Model):
@@ -44,4 +44,74 @@ class TaskStage(models.Model):
         string='Rating Email Template',
         domain="[('model', '=', 'task.management')]",
         help='Email template to send for rating when task is completed'
-    )
\ No newline at end of file
+    )
+    
+    # ========== STAGE REGISTRY ==========
+    
+    DEFAULT_STAGE_XMLID = 'task_management.task_stage_todo'
+    
+    @tools.ormcache()
+    def _get_stage_registry(self):
+        """Build the in-process stage registry, cached until a stage changes
+
+        :return: dict with the ordered stage ids ('all'), stage ids per
+                 stage_type ('by_type') and stage id per xml id ('by_xmlid')
+        """
+        by_type = {}
+        all_ids = []
+        for stage in self.sudo().search_read([], ['stage_type']):
+            all_ids.append(stage['id'])
+            by_type.setdefault(stage['stage_type'], []).append(stage['id'])
+        by_xmlid = {
+            f"{data['module']}.{data['name']}": data['res_id']
+            for data in self.env['ir.model.data'].sudo().search_read(
+                [('model', '=', self._name)], ['module', 'name', 'res_id'])
+        }
+        return {
+            'all': tuple(all_ids),
+            'by_type': {stage_type: tuple(ids) for stage_type, ids in by_type.items()},
+            'by_xmlid': by_xmlid,
+        }
+    
+    @api.model
+    def _get_stage_ids(self):
+        """Return all stages in kanban order"""
+        return self.browse(self._get_stage_registry()['all'])
+    
+    @api.model
+    def _get_stage_by_type(self, stage_type):
+        """Return the first stage of the given type"""
+        ids = self._get_stage_registry()['by_type'].get(stage_type, ())
+        return self.browse(ids[:1])
+    
+    @api.model
+    def _get_stage_by_xmlid(self, xmlid):
+        """Return the stage with the given xml id, or an empty recordset"""
+        stage_id = self._get_stage_registry()['by_xmlid'].get(xmlid)
+        return self.browse(stage_id or [])
+    
+    @api.model
+    def _get_default_stage(self):
+        """Return the stage new tasks start in (independent of the user language)"""
+        return (
+            self._get_stage_by_xmlid(self.DEFAULT_STAGE_XMLID)
+            or self._get_stage_by_type('new')
+            or self._get_stage_ids()[:1]
+        )
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        stages = super(TaskStage, self).create(vals_list)
+        self.env.registry.clear_cache()
+        return stages
+    
+    def write(self, vals):
+        result = super(TaskStage, self).write(vals)
+        if {'sequence', 'stage_type'} & set(vals):
+            self.env.registry.clear_cache()
+        return result
+    
+    def unlink(self):
+        result = super(TaskStage, self).unlink()
+        self.env.registry.clear_cache()
+        return result
@@ -2,6 +2,7 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+from .task_metrics import instrument
 from datetime import datetime
 
 
@@ -118,6 +119,16 @@ class TaskSubtask(models.Model):
     
     # REMOVED: _onchange_is_done method - no longer updates parent progress
     
+    def write(self, vals):
+        if 'user_ids' in vals or 'parent_task_id' in vals:
+            self.env['task.sync.tombstone']._track_access(self)
+        return super(TaskSubtask, self).write(vals)
+    
+    @instrument('subtask.unlink')
+    def unlink(self):
+        self.env['task.sync.tombstone']._record_removed(self)
+        return super(TaskSubtask, self).unlink()
+    
     def name_get(self):
         """Display subtask with assignees"""
         result = []
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import ValidationError
+from odoo.tools import SQL
+from datetime import timedelta
+import base64
+import json
+
+# Synced models and the fields sent for each changed record
+SYNC_FIELDS = {
+    'task.management': [
+        'name', 'task_type', 'user_id', 'team_id', 'team_ids', 'stage_id', 'priority', 'tag_ids',
+        'date_deadline', 'date_start', 'date_end', 'planned_hours', 'effective_hours',
+        'total_logged_hours', 'is_closed', 'parent_id', 'active',
+    ],
+    'task.subtask': [
+        'name', 'sequence', 'parent_task_id', 'user_ids', 'is_done', 'deadline',
+    ],
+    'task.timesheet.line': [
+        'name', 'task_id', 'subtask_id', 'user_id', 'date', 'status', 'planned_hours', 'unit_amount',
+    ],
+}
+# Paths to the users who can read a synced record, following the record rules
+# of security/task_security.xml (task managers read every record)
+SYNC_AUDIENCE_FIELDS = {
+    'task.management': ('access_user_ids',),
+    'task.subtask': ('parent_task_id.access_user_ids', 'user_ids'),
+    'task.timesheet.line': ('task_id.user_id', 'user_id'),
+}
+SYNC_PAGE_SIZE = 200
+SYNC_MAX_PAGE_SIZE = 1000
+SYNC_TOMBSTONE_DAYS = 30
+
+
+class TaskSyncTombstone(models.Model):
+    """
+    Synced records deleted, or gone out of the access of a user, reported to
+    the delta-sync clients that could read them until they expire.
+    """
+    _name = 'task.sync.tombstone'
+    _description = 'Task Sync Tombstone'
+    _order = 'date, id'
+    _log_access = False
+
+    model = fields.Char(string='Model', required=True)
+    res_id = fields.Integer(string='Record ID', required=True)
+    user_id = fields.Many2one(
+        'res.users', string='User', index=True, ondelete='cascade',
+        help='User who could read the record. Empty for the users reading every record of the model.')
+    date = fields.Datetime(string='Removed On', required=True, default=lambda self: self.env.cr.now(), index=True)
+
+    def init(self):
+        """Keyset indexes for the delta-sync queries of every synced model and of the tombstones"""
+        for model_name in SYNC_FIELDS:
+            table = self.env[model_name]._table
+            tools.create_index(self.env.cr, '%s_write_date_id_idx' % table, table, ['write_date', 'id'])
+        tools.create_index(self.env.cr, 'task_sync_tombstone_date_id_idx', self._table, ['date', 'id'])
+
+    @api.model
+    def _get_retention_days(self):
+        return int(self.env['ir.config_parameter'].sudo().get_param(
+            'task_management.sync_tombstone_days', SYNC_TOMBSTONE_DAYS))
+
+    @api.model
+    def _get_audience(self, records):
+        """Users who can read each of ``records`` through the record rules: {id: set(user ids)}"""
+        records = records.sudo().with_context(active_test=False).exists()
+        paths = SYNC_AUDIENCE_FIELDS[records._name]
+        return {record.id: {user_id for path in paths for user_id in record.mapped(path).ids} for record in records}
+
+    @api.model
+    def _record_removed(self, records):
+        """Record tombstones for records about to be deleted, for every user who can read them"""
+        if not records:
+            return
+        audience = self._get_audience(records)
+        self.sudo().create([{'model': records._name, 'res_id': res_id} for res_id in records.ids] + [
+            {'model': records._name, 'res_id': res_id, 'user_id': user_id}
+            for res_id, user_ids in audience.items()
+            for user_id in user_ids
+        ])
+
+    @api.model
+    def _track_access(self, records):
+        """
+        Remember who can read ``records`` before a change that may revoke
+        access: the users who lost it at the end of the transaction get a
+        tombstone (see _record_access_losses).
+        """
+        if not records:
+            return
+        data = self.env.cr.precommit.data
+        if 'task_management.sync_access' not in data:
+            data['task_management.sync_access'] = {}
+            self.env.cr.precommit.add(self._record_access_losses)
+        previous = data['task_management.sync_access'].setdefault(records._name, {})
+        for res_id, user_ids in self._get_audience(records).items():
+            previous.setdefault(res_id, set()).update(user_ids)
+
+    @api.model
+    def _record_access_losses(self):
+        pending = self.env.cr.precommit.data.pop('task_management.sync_access', None)
+        if not pending:
+            return
+        vals_list = []
+        for model_name, previous in pending.items():
+            # Deleted records are gone from the audience: they have their own tombstones
+            audience = self._get_audience(self.env[model_name].browse(previous))
+            vals_list += [
+                {'model': model_name, 'res_id': res_id, 'user_id': user_id}
+                for res_id, user_ids in audience.items()
+                for user_id in previous[res_id] - user_ids
+            ]
+        if vals_list:
+            self.sudo().create(vals_list)
+
+    @api.autovacuum
+    def _gc_expired_tombstones(self):
+        limit_date = fields.Datetime.now() - timedelta(days=self._get_retention_days())
+        self.env.cr.execute("DELETE FROM task_sync_tombstone WHERE date < %s", [limit_date])
+
+
+class TaskSync(models.AbstractModel):
+    """Keyset-paginated delta sync of tasks, subtasks and time logs"""
+    _name = 'task.sync'
+    _description = 'Task Delta Sync'
+
+    @api.model
+    def get_changes(self, cursor=None, limit=SYNC_PAGE_SIZE):
+        """
+        Return the synced records changed since ``cursor``, within the record
+        rules of the current user.
+
+        :param cursor: opaque cursor returned by the previous call (None for a full sync)
+        :param limit: page size per model
+        :return: {'changes': {model: [values]}, 'removed': {model: [ids]},
+                  'cursor': str, 'has_more': bool, 'reset': bool}
+            ``reset`` means the cursor was too old: the client must drop its copy
+            and apply this (full) sync instead. Archived records, and records
+            the user could read but cannot anymore (access revoked, task
+            reassigned...), are reported in ``removed`` like deleted ones.
+        """
+        limit = max(1, min(int(limit), SYNC_MAX_PAGE_SIZE))
+        state = self._decode_cursor(cursor)
+        now = self.env.cr.now()
+        horizon = self._get_horizon()
+        Tombstone = self.env['task.sync.tombstone'].sudo()
+
+        reset = False
+        issued = state.get('issued')
+        if issued and fields.Datetime.to_datetime(issued) < now - timedelta(days=Tombstone._get_retention_days()):
+            state, reset = {}, True
+
+        result = {'changes': {}, 'removed': {}, 'has_more': False, 'reset': reset}
+        for model_name, fnames in SYNC_FIELDS.items():
+            records, position, has_more = self._read_changed_records(
+                model_name, state.get(model_name), horizon, limit)
+            if position:
+                state[model_name] = position
+            result['has_more'] |= has_more
+            result['changes'][model_name] = [record for record in records if record.get('active') is not False]
+            result['removed'][model_name] = [record['id'] for record in records if record.get('active') is False]
+
+        tombstones, position, has_more = self._read_tombstones(state.get('tombstone'), horizon, limit)
+        if position:
+            state['tombstone'] = position
+        result['has_more'] |= has_more
+        for model_name, res_ids in tombstones.items():
+            # Access lost then given back within the cursor window: the record is still there
+            visible_ids = set(self.env[model_name].with_context(active_test=False).search([('id', 'in', res_ids)]).ids)
+            result['removed'][model_name] += [res_id for res_id in res_ids if res_id not in visible_ids]
+
+        state['issued'] = fields.Datetime.to_string(now)
+        result['cursor'] = self._encode_cursor(state)
+        return result
+
+    @api.model
+    def _get_horizon(self):
+        """
+        Start of the oldest transaction still in progress on the database (or
+        now). Write dates are transaction start times, so every record written
+        before it is committed, however long its transaction took: serving
+        only those keeps a cursor from skipping rows committed late.
+        """
+        self.env.cr.execute("""
+            SELECT LEAST(MIN(xact_start), now()) AT TIME ZONE 'UTC'
+              FROM pg_stat_activity
+             WHERE datname = current_database()
+               AND pid != pg_backend_pid()
+               AND xact_start IS NOT NULL
+        """)
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _read_changed_records(self, model_name, position, horizon, limit):
+        """
+        Read one keyset page of the records of ``model_name`` the user can
+        read, changed after ``position``.
+
+        :return: (values, new position [write_date, id] or None, has_more)
+        """
+        Model = self.env[model_name].with_context(active_test=False)
+        Model.check_access('read')
+        query = Model._search([('write_date', '<', horizon)], order='write_date, id', limit=limit + 1)
+        write_date = SQL.identifier(query.table, 'write_date')
+        record_id = SQL.identifier(query.table, 'id')
+        if position:
+            # Row comparison keeps (write_date, id) as a single keyset on the index
+            query.add_where(SQL("(%s, %s) > (%s::timestamp, %s)", write_date, record_id, position[0], position[1]))
+        self.env.cr.execute(query.select(record_id, SQL("%s::text", write_date)))
+        rows = self.env.cr.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if not rows:
+            return [], None, False
+        values = Model.browse([row[0] for row in rows]).read(SYNC_FIELDS[model_name] + ['write_date'])
+        return values, [rows[-1][1], rows[-1][0]], has_more
+
+    @api.model
+    def _read_tombstones(self, position, horizon, limit):
+        """
+        Read one keyset page of the tombstones of the user: those of the
+        records they could read, and for task managers (who read every
+        record) those of all the deleted records.
+
+        :return: ({model: [ids]}, new position [date, id] or None, has_more)
+        """
+        user_domain = [('user_id', '=', self.env.uid)]
+        if self.env.user.has_group('task_management.group_task_manager'):
+            user_domain = ['|', ('user_id', '=', False)] + user_domain
+        query = self.env['task.sync.tombstone'].sudo()._search(
+            [('date', '<', horizon)] + user_domain, order='date, id', limit=limit + 1)
+        date = SQL.identifier(query.table, 'date')
+        tombstone_id = SQL.identifier(query.table, 'id')
+        # Cursors issued before the tombstones had a keyset carried their id only
+        if isinstance(position, list):
+            query.add_where(SQL("(%s, %s) > (%s::timestamp, %s)", date, tombstone_id, position[0], position[1]))
+        self.env.cr.execute(query.select(
+            tombstone_id, SQL("%s::text", date),
+            SQL.identifier(query.table, 'model'), SQL.identifier(query.table, 'res_id'),
+        ))
+        rows = self.env.cr.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if not rows:
+            return {}, None, False
+        removed = {}
+        for _tombstone_id, _date, model_name, res_id in rows:
+            removed.setdefault(model_name, {})[res_id] = True
+        return (
+            {model_name: list(res_ids) for model_name, res_ids in removed.items() if model_name in SYNC_FIELDS},
+            [rows[-1][1], rows[-1][0]],
+            has_more,
+        )
+
+    @api.model
+    def _decode_cursor(self, cursor):
+        if not cursor:
+            return {}
+        try:
+            return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except ValueError:
+            raise ValidationError(_('Invalid synchronization cursor.'))
+
+    @api.model
+    def _encode_cursor(self, state):
+        return base64.urlsafe_b64encode(json.dumps(state).encode()).decode()
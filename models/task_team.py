@@ -2,6 +2,7 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+from .task_metrics import instrument
 
 
 class TaskTeam(models.Model):
@@ -92,7 +93,8 @@ class TaskTeam(models.Model):
     all_member_ids = fields.Many2many(
         'res.users',
         string='All Members (Including Sub-teams)',
-        compute='_compute_all_members'
+        compute='_compute_all_members',
+        search='_search_all_members'
     )
     
     team_type = fields.Selection([
@@ -114,12 +116,86 @@ class TaskTeam(models.Model):
                 team.team_type = 'standalone'
     
     @api.depends('member_ids', 'child_team_ids.member_ids')
+    @instrument('team.compute_all_members')
     def _compute_all_members(self):
+        subtree_members = self._get_subtree_members(self.ids)
         for team in self:
-            members = team.member_ids
-            for child in team.child_team_ids:
-                members |= child.all_member_ids
-            team.all_member_ids = members
+            if team.id:
+                team.all_member_ids = [(6, 0, list(subtree_members.get(team.id, ())))]
+            else:
+                # Unsaved team: no parent_path yet, combine what is in memory
+                members = team.member_ids
+                for child in team.child_team_ids:
+                    members |= child.all_member_ids
+                team.all_member_ids = members
+    
+    def _search_all_members(self, operator, value):
+        if operator not in ('in', 'not in', '=', '!='):
+            raise NotImplementedError(_('Unsupported search on All Members: %s') % operator)
+        user_ids = value if isinstance(value, (list, tuple)) else [value]
+        team_ids = set()
+        for user_id in user_ids:
+            if user_id:
+                team_ids |= self._get_user_team_ids(user_id)
+        if operator in ('in', '='):
+            return [('id', 'in', list(team_ids))]
+        return [('id', 'not in', list(team_ids))]
+    
+    # ========== SUBTREE MEMBERSHIP ==========
+    
+    @api.model
+    def _get_membership_cache(self):
+        """Membership lookups cached for the current transaction"""
+        return self.env.cr.cache.setdefault('task_team_membership', {'subtree_members': {}, 'user_teams': {}})
+    
+    @api.model
+    def _invalidate_membership_cache(self):
+        self.env.cr.cache.pop('task_team_membership', None)
+    
+    @api.model
+    def _get_subtree_members(self, team_ids):
+        """
+        Return {team_id: frozenset(user_ids)} with the members of each team and
+        of all its sub-teams, from one parent_path prefix query.
+        """
+        cache = self._get_membership_cache()['subtree_members']
+        missing = [team_id for team_id in team_ids if team_id and team_id not in cache]
+        if missing:
+            self.flush_model(['parent_path', 'member_ids'])
+            self.env.cr.execute("""
+                SELECT root.id, rel.user_id
+                  FROM task_team root
+                  JOIN task_team sub ON sub.parent_path LIKE root.parent_path || '%%'
+                  JOIN task_team_members_rel rel ON rel.team_id = sub.id
+                 WHERE root.id = ANY(%s)
+            """, [missing])
+            members = {team_id: set() for team_id in missing}
+            for team_id, user_id in self.env.cr.fetchall():
+                members[team_id].add(user_id)
+            cache.update((team_id, frozenset(user_ids)) for team_id, user_ids in members.items())
+        return {team_id: cache[team_id] for team_id in team_ids if team_id in cache}
+    
+    @api.model
+    def _get_user_team_ids(self, user_id):
+        """
+        Return the ids of the teams a user belongs to, directly or through a
+        sub-team (i.e. the user's teams and all their ancestors).
+        """
+        cache = self._get_membership_cache()['user_teams']
+        if user_id not in cache:
+            self.flush_model(['parent_path', 'member_ids'])
+            self.env.cr.execute("""
+                SELECT team.parent_path
+                  FROM task_team team
+                  JOIN task_team_members_rel rel ON rel.team_id = team.id
+                 WHERE rel.user_id = %s
+            """, [user_id])
+            cache[user_id] = frozenset(
+                int(team_id)
+                for parent_path, in self.env.cr.fetchall()
+                for team_id in parent_path.split('/') if team_id
+            )
+        return cache[user_id]
     
     @api.depends('task_ids')
     def _compute_task_count(self):
@@ -152,6 +228,7 @@ class TaskTeam(models.Model):
         return res
     
     @api.model
+    @instrument('team.create')
     def create(self, vals):
         # Auto-add manager to members if not already included
         if 'manager_id' in vals and vals.get('manager_id'):
@@ -169,8 +246,13 @@ class TaskTeam(models.Model):
             else:
                 vals['member_ids'] = [(4, vals['manager_id'])]
         
-        return super(TaskTeam, self).create(vals)
+        self._invalidate_membership_cache()
+        teams = super(TaskTeam, self).create(vals)
+        # Computes run during the create may have cached the previous membership
+        self._invalidate_membership_cache()
+        return teams
     
+    @instrument('team.write')
     def write(self, vals):
         # Auto-add manager to members if changed
         if 'manager_id' in vals and vals.get('manager_id'):
@@ -182,7 +264,32 @@ class TaskTeam(models.Model):
                     else:
                         vals['member_ids'] = [(4, vals['manager_id'])]
         
-        return super(TaskTeam, self).write(vals)
+        membership_changed = 'member_ids' in vals or 'parent_team_id' in vals
+        if membership_changed:
+            self._invalidate_membership_cache()
+        if 'member_ids' in vals or 'manager_id' in vals:
+            # Members and manager read the tasks of the team: report the ones who lose them to sync clients
+            self.env['task.management'].sudo().with_context(active_test=False).search([
+                ('team_id', 'in', self.ids),
+            ])._track_sync_access()
+        result = super(TaskTeam, self).write(vals)
+        if membership_changed:
+            # Computes run during the write may have cached the previous membership
+            self._invalidate_membership_cache()
+        return result
+    
+    @instrument('team.unlink')
+    def unlink(self):
+        # The database cascade would delete the tasks of these teams and their
+        # sub-teams behind TaskManagement.unlink: delete them through the ORM
+        # so that time log rollups, sync tombstones and template usage follow
+        self.env['task.management'].sudo().with_context(active_test=False).search([
+            ('team_id', 'child_of', self.ids),
+        ]).unlink()
+        self._invalidate_membership_cache()
+        result = super(TaskTeam, self).unlink()
+        self._invalidate_membership_cache()
+        return result
     
     def action_create_task(self):
         """Create a new task for this team"""
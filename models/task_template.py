@@ -1,6 +1,13 @@
 # -*- coding: utf-8 -*-
 
 from odoo import models, fields, api, _
+from .task_management import TEMPLATE_RECENT_USAGE_DAYS
+from datetime import timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+USAGE_STAT_FIELDS = ('usage_count', 'recent_usage_count', 'completed_count', 'completion_hours_total', 'avg_completion_days')
 
 
 class TaskTemplate(models.Model):
@@ -42,54 +49,147 @@ class TaskTemplate(models.Model):
     # Checklist Template
     checklist_template = fields.Text(string='Checklist Template')
     
-    # Usage tracking
-    usage_count = fields.Integer(string='Times Used', compute='_compute_usage_count')
+    # Usage statistics: kept up to date incrementally by the tasks (see
+    # _apply_usage_deltas) and reconciled by _cron_refresh_usage_stats
+    usage_count = fields.Integer(string='Times Used', default=0, readonly=True)
+    recent_usage_count = fields.Integer(
+        string='Uses (30 Days)', default=0, readonly=True,
+        help='Tasks created from this template during the last 30 days')
+    completed_count = fields.Integer(string='Completed Tasks', default=0, readonly=True)
+    completion_hours_total = fields.Float(default=0.0, readonly=True)
+    avg_completion_days = fields.Float(
+        string='Avg. Completion (Days)', default=0.0, readonly=True,
+        aggregator='avg', help='Average time from creation to closing of the tasks created from this template')
     last_used_date = fields.Datetime(string='Last Used', readonly=True)
     
-    def _compute_usage_count(self):
-        for template in self:
-            template.usage_count = self.env['task.management'].search_count([
-                ('template_id', '=', template.id)
-            ])
+    @api.model
+    def _get_recent_usage_start(self):
+        return fields.Datetime.now() - timedelta(days=TEMPLATE_RECENT_USAGE_DAYS)
+    
+    @api.model
+    def _apply_usage_deltas(self, deltas):
+        """
+        Add signed deltas to the usage statistics with one update.
+
+        :param deltas: {template_id: [usage, recent, completed, completion_hours]}
+        """
+        rows = [(template_id,) + tuple(values) for template_id, values in deltas.items() if any(values)]
+        if not rows:
+            return
+        self.flush_model(list(USAGE_STAT_FIELDS))
+        self.env.cr.execute("""
+            UPDATE task_template t
+               SET usage_count = GREATEST(COALESCE(t.usage_count, 0) + d.usage, 0),
+                   recent_usage_count = GREATEST(COALESCE(t.recent_usage_count, 0) + d.recent, 0),
+                   completed_count = GREATEST(COALESCE(t.completed_count, 0) + d.completed, 0),
+                   completion_hours_total = GREATEST(COALESCE(t.completion_hours_total, 0) + d.hours, 0),
+                   avg_completion_days = CASE
+                       WHEN COALESCE(t.completed_count, 0) + d.completed > 0
+                       THEN GREATEST(COALESCE(t.completion_hours_total, 0) + d.hours, 0)
+                            / (COALESCE(t.completed_count, 0) + d.completed) / 24.0
+                       ELSE 0 END
+              FROM (VALUES %s) AS d (id, usage, recent, completed, hours)
+             WHERE t.id = d.id
+        """ % ', '.join(['(%s, %s, %s, %s, %s::float)'] * len(rows)), [value for row in rows for value in row])
+        self.browse([row[0] for row in rows]).invalidate_recordset(list(USAGE_STAT_FIELDS))
+    
+    @api.model
+    def _cron_refresh_usage_stats(self):
+        """Slide the 30-day window of the usage counters, and reconcile all statistics with the tasks"""
+        self.env['task.management'].flush_model(['template_id', 'date_closed'])
+        self.flush_model(list(USAGE_STAT_FIELDS))
+        self.env.cr.execute("""
+            UPDATE task_template t
+               SET usage_count = s.usage,
+                   recent_usage_count = s.recent,
+                   completed_count = s.completed,
+                   completion_hours_total = s.hours,
+                   avg_completion_days = CASE WHEN s.completed > 0 THEN s.hours / s.completed / 24.0 ELSE 0 END
+              FROM (
+                    SELECT tt.id,
+                           COUNT(tm.id) AS usage,
+                           COUNT(tm.id) FILTER (WHERE tm.create_date >= %s) AS recent,
+                           COUNT(tm.date_closed) AS completed,
+                           COALESCE(SUM(GREATEST(EXTRACT(EPOCH FROM tm.date_closed - tm.create_date), 0)) / 3600.0, 0) AS hours
+                      FROM task_template tt
+                 LEFT JOIN task_management tm ON tm.template_id = tt.id
+                  GROUP BY tt.id
+                   ) s
+             WHERE t.id = s.id
+               AND (t.usage_count IS DISTINCT FROM s.usage
+                    OR t.recent_usage_count IS DISTINCT FROM s.recent
+                    OR t.completed_count IS DISTINCT FROM s.completed
+                    OR ABS(COALESCE(t.completion_hours_total, 0) - s.hours) > 0.001)
+        """, [self._get_recent_usage_start()])
+        _logger.info('Refreshed the usage statistics of %s task templates', self.env.cr.rowcount)
+        self.invalidate_model(list(USAGE_STAT_FIELDS))
     
     def action_use_template(self):
         """Create a new task from this template"""
         self.ensure_one()
-        
-        # Create the task
-        task_vals = {
-            'name': self.name,
-            'description': self.description,
-            'planned_hours': self.planned_hours,
-            'priority': self.priority,
-            'tag_ids': [(6, 0, self.tag_ids.ids)],
-            'user_id': self.user_id.id if self.user_id else self.env.user.id,
-            'template_id': self.id,
-        }
-        
-        new_task = self.env['task.management'].create(task_vals)
-        
-        # Create subtasks from template
-        for subtask_template in self.subtask_template_ids:
-            self.env['task.subtask'].create({
-                'name': subtask_template.name,
-                'parent_task_id': new_task.id,
-                'sequence': subtask_template.sequence,
-                'description': subtask_template.description,
-            })
-        
-        # Update last used date
-        self.last_used_date = fields.Datetime.now()
+        task_id = self.instantiate([{}])[0]
         
         # Return action to open the new task
         return {
             'type': 'ir.actions.act_window',
             'res_model': 'task.management',
-            'res_id': new_task.id,
+            'res_id': task_id,
             'view_mode': 'form',
             'target': 'current',
         }
     
+    def instantiate(self, targets):
+        """
+        Stamp this template onto many tasks at once.
+        
+        :param targets: list of dicts of task values overriding the template
+            defaults, one per task to create, e.g. ``{'user_id': 7}``,
+            ``{'task_type': 'team', 'team_id': 3}`` or
+            ``{'date_start': '2026-01-05', 'date_deadline': '2026-01-09'}``
+        :return: the ids of the new tasks, in the order of ``targets``
+        """
+        self.ensure_one()
+        if not targets:
+            return []
+        
+        base_vals = self._get_task_values()
+        vals_list = []
+        for overrides in targets:
+            vals = dict(base_vals, **overrides)
+            if vals.get('task_type') != 'team':
+                vals.setdefault('user_id', self.user_id.id or self.env.uid)
+            vals_list.append(vals)
+        tasks = self.env['task.management'].create(vals_list)
+        
+        # All subtasks of all new tasks in a single create
+        subtask_values = [{
+            'name': subtask_template.name,
+            'sequence': subtask_template.sequence,
+            'description': subtask_template.description,
+        } for subtask_template in self.subtask_template_ids]
+        if subtask_values:
+            self.env['task.subtask'].create([
+                dict(values, parent_task_id=task.id)
+                for task in tasks
+                for values in subtask_values
+            ])
+        
+        # The usage counters are maintained by the task creation
+        self.last_used_date = fields.Datetime.now()
+        return tasks.ids
+    
+    def _get_task_values(self):
+        """Task values shared by every task created from this template"""
+        self.ensure_one()
+        return {
+            'name': self.name,
+            'description': self.description,
+            'planned_hours': self.planned_hours,
+            'priority': self.priority,
+            'tag_ids': [(6, 0, self.tag_ids.ids)],
+            'template_id': self.id,
+        }
+    
     def action_view_tasks(self):
         """View all tasks created from this template"""
         self.ensure_one()
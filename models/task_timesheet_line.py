@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import ValidationError
+from odoo.tools import SQL, float_compare, float_is_zero
+from .task_metrics import instrument
 from datetime import datetime, timedelta
+from collections import defaultdict
 
 
 class TaskTimesheetLine(models.Model):
@@ -11,10 +14,16 @@ class TaskTimesheetLine(models.Model):
     _order = 'date desc, id desc'
     _rec_name = 'name'
 
+    # Fields whose changes shift the stored time log totals of the task
+    _TASK_TOTAL_FIELDS = ('task_id', 'planned_hours', 'unit_amount')
+    # Fields whose changes shift the daily rollups
+    _ROLLUP_FIELDS = _TASK_TOTAL_FIELDS + ('subtask_id', 'user_id', 'date')
+
     name = fields.Html(
         string='Work Description',
         required=True,
         sanitize=True,
+        index='trigram',
         help='Detailed description with rich text formatting'
     )
     
@@ -97,6 +106,16 @@ class TaskTimesheetLine(models.Model):
         store=True
     )
     
+    def init(self):
+        """Full-text index of the notes, searched with the tasks (see TaskManagement.search_ranked)"""
+        tools.create_index(
+            self.env.cr,
+            'task_timesheet_line_name_fts_idx',
+            self._table,
+            ["to_tsvector('simple', COALESCE(name, ''))"],
+            method='gin',
+        )
+    
     @api.depends('planned_hours', 'unit_amount')
     def _compute_remaining_hours(self):
         """Calculate remaining hours per entry"""
@@ -143,16 +162,74 @@ class TaskTimesheetLine(models.Model):
             if record.date > today:
                 raise ValidationError(_('You cannot log time for future dates'))
     
-    @api.model
-    def create(self, vals):
-        """Override create to auto-fill description if needed"""
-        if not vals.get('name') and vals.get('subtask_id'):
-            subtask = self.env['task.subtask'].browse(vals['subtask_id'])
-            vals['name'] = f"<p>Worked on: <strong>{subtask.name}</strong></p>"
-        elif not vals.get('name'):
-            vals['name'] = "<p>General work</p>"
+    @api.model_create_multi
+    @instrument('timesheet_line.create')
+    def create(self, vals_list):
+        """Override create to auto-fill description and roll totals up to the tasks"""
+        for vals in vals_list:
+            if not vals.get('name') and vals.get('subtask_id'):
+                subtask = self.env['task.subtask'].browse(vals['subtask_id'])
+                vals['name'] = f"<p>Worked on: <strong>{subtask.name}</strong></p>"
+            elif not vals.get('name'):
+                vals['name'] = "<p>General work</p>"
         
-        return super(TaskTimesheetLine, self).create(vals)
+        lines = super(TaskTimesheetLine, self).create(vals_list)
+        self.env['task.management']._apply_timesheet_deltas({}, lines._get_task_totals())
+        self.env['task.timesheet.rollup']._apply_deltas(lines._get_rollup_deltas())
+        return lines
+    
+    @instrument('timesheet_line.write')
+    def write(self, vals):
+        """Override write to apply total and rollup deltas for the affected entries only"""
+        if 'user_id' in vals or 'task_id' in vals:
+            self.env['task.sync.tombstone']._track_access(self)
+        if not any(fname in vals for fname in self._ROLLUP_FIELDS):
+            return super(TaskTimesheetLine, self).write(vals)
+        
+        update_totals = any(fname in vals for fname in self._TASK_TOTAL_FIELDS)
+        if update_totals:
+            removed = self._get_task_totals()
+        removed_rollups = self._get_rollup_deltas(sign=-1)
+        result = super(TaskTimesheetLine, self).write(vals)
+        if update_totals:
+            self.env['task.management']._apply_timesheet_deltas(removed, self._get_task_totals())
+        
+        deltas = self._get_rollup_deltas()
+        for key, values in removed_rollups.items():
+            deltas[key] = [total + value for total, value in zip(deltas[key], values)]
+        self.env['task.timesheet.rollup']._apply_deltas(deltas)
+        return result
+    
+    @instrument('timesheet_line.unlink')
+    def unlink(self):
+        """Override unlink to subtract the removed entries from their tasks"""
+        removed = self._get_task_totals()
+        removed_rollups = self._get_rollup_deltas(sign=-1)
+        self.env['task.sync.tombstone']._record_removed(self)
+        result = super(TaskTimesheetLine, self).unlink()
+        self.env['task.management']._apply_timesheet_deltas(removed, {})
+        self.env['task.timesheet.rollup']._apply_deltas(removed_rollups)
+        return result
+    
+    def _get_task_totals(self):
+        """Sum these entries per task as {task_id: [planned, logged, remaining]}"""
+        totals = defaultdict(lambda: [0.0, 0.0, 0.0])
+        for line in self:
+            task_totals = totals[line.task_id.id]
+            task_totals[0] += line.planned_hours
+            task_totals[1] += line.unit_amount
+            task_totals[2] += line.remaining_hours
+        return totals
+    
+    def _get_rollup_deltas(self, sign=1):
+        """Signed rollup deltas of these entries, keyed by (task, subtask, user, team, date)"""
+        deltas = defaultdict(lambda: [0.0, 0.0, 0])
+        for line in self:
+            values = deltas[(line.task_id.id, line.subtask_id.id, line.user_id.id, line.task_id.team_id.id, line.date)]
+            values[0] += sign * line.planned_hours
+            values[1] += sign * line.unit_amount
+            values[2] += sign
+        return deltas
     
     def action_edit_time_log(self):
         """Open simplified form view for editing"""
@@ -175,33 +252,196 @@ class TaskTimesheetLine(models.Model):
             today = fields.Date.today()
             date_from = today - timedelta(days=today.weekday())
         if not date_to:
-            date_to = date_from + timedelta(days=6)
+            date_to = fields.Date.to_date(date_from) + timedelta(days=6)
+        
+        rows = self._read_rollup_cells(date_from, date_to, user_ids=[user_id])
+        days = set()
+        details = {}
+        for _user_id, task_id, date, hours, entries in rows:
+            days.add(date)
+            task_details = details.setdefault(task_id, {'hours': 0.0, 'entries': 0})
+            task_details['hours'] += hours
+            task_details['entries'] += entries
+        
+        task_names = {task.id: task.name for task in self.env['task.management'].browse(details)}
+        return {
+            'total_hours': sum(values['hours'] for values in details.values()),
+            'days_worked': len(days),
+            'tasks_worked': len(details),
+            'details': [
+                {'task': task_names[task_id], 'hours': values['hours'], 'entries': values['entries']}
+                for task_id, values in details.items()
+            ],
+        }
+    
+    # ========== TIME GRID ==========
+    
+    @api.model
+    def _read_rollup_cells(self, date_from, date_to, user_ids=None, task_ids=None):
+        """
+        Return [(user_id, task_id, date, hours, entries)] from the task x day
+        rollup, restricted to the tasks the current user can read and to the
+        cells holding time logs the time log record rules let them read.
+        """
+        self.check_access('read')
+        query = """
+            SELECT user_id, task_id, date, SUM(unit_amount), SUM(entry_count)
+              FROM task_timesheet_rollup_task_day
+             WHERE date BETWEEN %s AND %s
+               AND entry_count > 0
+        """
+        params = [date_from, date_to]
+        if user_ids is not None:
+            query += " AND user_id = ANY(%s)"
+            params.append(list(user_ids))
+        if task_ids is not None:
+            query += " AND task_id = ANY(%s)"
+            params.append(list(task_ids))
+        query += " GROUP BY user_id, task_id, date ORDER BY user_id, task_id, date"
+        self.env.cr.execute(query, params)
+        rows = self.env.cr.fetchall()
+        
+        # Rollups bypass record rules: keep the tasks visible through the ORM
+        visible_task_ids = set(self.env['task.management'].search([('id', 'in', list({row[1] for row in rows}))]).ids)
+        rows = [row for row in rows if row[1] in visible_task_ids]
+        if rows and self.env['ir.rule']._compute_domain(self._name, 'read'):
+            # ... and the cells whose time logs pass the time log rules
+            query = self._search([
+                ('user_id', 'in', list({row[0] for row in rows})),
+                ('task_id', 'in', list({row[1] for row in rows})),
+                ('date', '>=', date_from),
+                ('date', '<=', date_to),
+            ])
+            self.env.cr.execute(query.select(SQL(
+                "DISTINCT %s, %s, %s",
+                SQL.identifier(query.table, 'user_id'),
+                SQL.identifier(query.table, 'task_id'),
+                SQL.identifier(query.table, 'date'),
+            )))
+            visible_cells = set(self.env.cr.fetchall())
+            rows = [row for row in rows if row[:3] in visible_cells]
+        return rows
+    
+    @api.model
+    def get_time_grid(self, date_from, date_to, user_ids=None, task_ids=None):
+        """
+        Return the user x task x day hours matrix of a date range:
+        {'dates': [...], 'users': {id: name}, 'tasks': {id: name},
+         'rows': [{'user_id', 'task_id', 'hours': [one value per date]}]}
+        """
+        date_from = fields.Date.to_date(date_from)
+        date_to = fields.Date.to_date(date_to)
+        if date_to < date_from:
+            raise ValidationError(_('The end date of the time grid must be after its start date.'))
+        dates = [date_from + timedelta(days=offset) for offset in range((date_to - date_from).days + 1)]
+        date_index = {date: index for index, date in enumerate(dates)}
+        
+        rows = {}
+        for user_id, task_id, date, hours, _entries in self._read_rollup_cells(date_from, date_to, user_ids, task_ids):
+            row = rows.setdefault((user_id, task_id), [0.0] * len(dates))
+            row[date_index[date]] = hours
+        
+        users = self.env['res.users'].sudo().browse({user_id for user_id, _task_id in rows})
+        tasks = self.env['task.management'].browse({task_id for _user_id, task_id in rows})
+        return {
+            'dates': [fields.Date.to_string(date) for date in dates],
+            'users': {user.id: user.name for user in users},
+            'tasks': {task.id: task.name for task in tasks},
+            'rows': [
+                {'user_id': user_id, 'task_id': task_id, 'hours': hours}
+                for (user_id, task_id), hours in rows.items()
+            ],
+        }
+    
+    @api.model
+    def apply_time_grid(self, edits):
+        """
+        Apply a batch of time grid cell edits in one go.
         
-        domain = [
-            ('user_id', '=', user_id),
-            ('date', '>=', date_from),
-            ('date', '<=', date_to)
-        ]
+        :param edits: [{'user_id', 'task_id', 'date', 'hours', 'subtask_id' (optional)}]
+            where ``hours`` is the new total of the cell. Increases are added to
+            the latest time log of the cell (or a new one), decreases are taken
+            from the latest time logs first, removing the ones that reach zero.
+        :return: {'created': n, 'updated': n, 'deleted': n}
+        """
+        targets = {}
+        for edit in edits:
+            key = (edit['user_id'], edit['task_id'], fields.Date.to_date(edit['date']))
+            if not isinstance(edit.get('hours'), (int, float)):
+                raise ValidationError(_('Every time grid edit needs the new hours of its cell.'))
+            if edit['hours'] < 0:
+                raise ValidationError(_('Time grid hours cannot be negative.'))
+            targets[key] = edit
+        if not targets:
+            return {'created': 0, 'updated': 0, 'deleted': 0}
         
-        time_logs = self.search(domain)
+        # One search for the time logs of every edited cell
+        dates = [key[2] for key in targets]
+        lines = self.search([
+            ('user_id', 'in', list({key[0] for key in targets})),
+            ('task_id', 'in', list({key[1] for key in targets})),
+            ('date', '>=', min(dates)),
+            ('date', '<=', max(dates)),
+        ], order='date, id desc')
+        lines_by_cell = defaultdict(list)
+        for line in lines:
+            key = (line.user_id.id, line.task_id.id, line.date)
+            if key in targets:
+                lines_by_cell[key].append(line)
         
-        summary = {
-            'total_hours': sum(time_logs.mapped('unit_amount')),
-            'days_worked': len(set(time_logs.mapped('date'))),
-            'tasks_worked': len(set(time_logs.mapped('task_id'))),
-            'details': []
+        # Default subtask per task, for cells without a time log to extend
+        missing_task_ids = {
+            key[1] for key, edit in targets.items()
+            if not lines_by_cell[key] and not edit.get('subtask_id')
         }
+        default_subtasks = {}
+        for subtask in self.env['task.subtask'].search([('parent_task_id', 'in', list(missing_task_ids))]):
+            default_subtasks.setdefault(subtask.parent_task_id.id, subtask.id)
         
-        # Group by task
-        for task in time_logs.mapped('task_id'):
-            task_logs = time_logs.filtered(lambda l: l.task_id == task)
-            summary['details'].append({
-                'task': task.name,
-                'hours': sum(task_logs.mapped('unit_amount')),
-                'entries': len(task_logs)
-            })
+        to_create = []
+        new_amounts = {}
+        to_unlink = []
+        for key, edit in targets.items():
+            cell_lines = lines_by_cell[key]
+            difference = edit['hours'] - sum(line.unit_amount for line in cell_lines)
+            if float_is_zero(difference, precision_digits=2):
+                continue
+            if difference > 0:
+                if cell_lines and not edit.get('subtask_id'):
+                    new_amounts[cell_lines[0]] = cell_lines[0].unit_amount + difference
+                    continue
+                subtask_id = edit.get('subtask_id') or default_subtasks.get(key[1])
+                if not subtask_id:
+                    raise ValidationError(_('Add a subtask to the task before logging time on it.'))
+                to_create.append({
+                    'user_id': key[0],
+                    'task_id': key[1],
+                    'date': key[2],
+                    'subtask_id': subtask_id,
+                    'unit_amount': difference,
+                })
+                continue
+            for line in cell_lines:
+                if float_is_zero(difference, precision_digits=2):
+                    break
+                if float_compare(line.unit_amount, -difference, precision_digits=2) <= 0:
+                    to_unlink.append(line.id)
+                    difference += line.unit_amount
+                else:
+                    new_amounts[line] = line.unit_amount + difference
+                    break
         
-        return summary
+        # Group updates by value: one write per distinct amount
+        lines_by_amount = defaultdict(list)
+        for line, amount in new_amounts.items():
+            lines_by_amount[amount].append(line.id)
+        for amount, line_ids in lines_by_amount.items():
+            self.browse(line_ids).write({'unit_amount': amount})
+        if to_unlink:
+            self.browse(to_unlink).unlink()
+        if to_create:
+            self.create(to_create)
+        return {'created': len(to_create), 'updated': len(new_amounts), 'deleted': len(to_unlink)}
     
     # REMOVED: Validation against task planned hours - now per-entry based
     
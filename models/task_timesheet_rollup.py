@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api, tools
+from collections import defaultdict
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# table -> key columns; every table also carries planned_hours, unit_amount and entry_count
+ROLLUP_TABLES = {
+    'task_timesheet_rollup_user_day': ('user_id', 'date'),
+    'task_timesheet_rollup_team_day': ('team_id', 'date'),
+    'task_timesheet_rollup_task_day': ('task_id', 'subtask_id', 'user_id', 'date'),
+}
+
+
+class TaskTimesheetRollup(models.AbstractModel):
+    """
+    Daily time log rollups (user x day, team x day, task x day), maintained
+    incrementally from time log create/write/unlink so reports and summaries
+    never scan every log line.
+    """
+    _name = 'task.timesheet.rollup'
+    _description = 'Time Log Daily Rollups'
+
+    def init(self):
+        """Create the rollup tables, and backfill them when they are new"""
+        created = False
+        for table, keys in ROLLUP_TABLES.items():
+            if tools.table_exists(self.env.cr, table):
+                continue
+            # Missing dimensions (e.g. a task without team) are stored as 0 so keys stay unique
+            key_columns = ', '.join(
+                'date DATE NOT NULL' if key == 'date' else '%s INTEGER NOT NULL DEFAULT 0' % key
+                for key in keys
+            )
+            self.env.cr.execute("""
+                CREATE TABLE %(table)s (
+                    id SERIAL PRIMARY KEY,
+                    %(key_columns)s,
+                    planned_hours DOUBLE PRECISION NOT NULL DEFAULT 0,
+                    unit_amount DOUBLE PRECISION NOT NULL DEFAULT 0,
+                    entry_count INTEGER NOT NULL DEFAULT 0
+                )
+            """ % {'table': table, 'key_columns': key_columns})
+            self.env.cr.execute("CREATE UNIQUE INDEX %s_key_idx ON %s (%s)" % (
+                table, table, ', '.join(keys)))
+            self.env.cr.execute("CREATE INDEX %s_date_idx ON %s (date)" % (table, table))
+            created = True
+        if created:
+            self._rebuild()
+
+    @api.model
+    def _rebuild(self):
+        """Backfill: rebuild every rollup table from the time logs"""
+        self.env['task.timesheet.line'].flush_model()
+        self.env['task.management'].flush_model(['team_id'])
+        for table, keys in ROLLUP_TABLES.items():
+            self.env.cr.execute("TRUNCATE %s RESTART IDENTITY" % table)
+            columns = ', '.join(keys)
+            source_columns = ', '.join(
+                'tl.date' if key == 'date' else
+                'COALESCE(t.team_id, 0)' if key == 'team_id' else
+                'COALESCE(tl.%s, 0)' % key
+                for key in keys
+            )
+            self.env.cr.execute("""
+                INSERT INTO %(table)s (%(columns)s, planned_hours, unit_amount, entry_count)
+                SELECT %(source_columns)s,
+                       SUM(COALESCE(tl.planned_hours, 0)),
+                       SUM(COALESCE(tl.unit_amount, 0)),
+                       COUNT(*)
+                  FROM task_timesheet_line tl
+                  JOIN task_management t ON t.id = tl.task_id
+              GROUP BY %(source_columns)s
+            """ % {'table': table, 'columns': columns, 'source_columns': source_columns})
+        _logger.info('Time log rollups rebuilt')
+
+    @api.model
+    def _apply_deltas(self, deltas, tables=None):
+        """
+        Add signed deltas to the rollups with one upsert per table.
+
+        :param deltas: {(task_id, subtask_id, user_id, team_id, date): [planned, unit_amount, count]}
+        :param tables: rollup tables to update (all by default)
+        """
+        tables = {table: ROLLUP_TABLES[table] for table in (tables or ROLLUP_TABLES)}
+        per_table = {table: defaultdict(lambda: [0.0, 0.0, 0]) for table in tables}
+        for (task_id, subtask_id, user_id, team_id, date), values in deltas.items():
+            dimensions = {
+                'task_id': task_id or 0,
+                'subtask_id': subtask_id or 0,
+                'user_id': user_id or 0,
+                'team_id': team_id or 0,
+                'date': date,
+            }
+            for table, keys in tables.items():
+                totals = per_table[table][tuple(dimensions[key] for key in keys)]
+                for index, value in enumerate(values):
+                    totals[index] += value
+
+        for table, keys in tables.items():
+            rows = [
+                key + tuple(totals)
+                for key, totals in per_table[table].items()
+                if any(totals)
+            ]
+            if not rows:
+                continue
+            columns = ', '.join(keys)
+            self.env.cr.execute("""
+                INSERT INTO %(table)s AS r (%(columns)s, planned_hours, unit_amount, entry_count)
+                VALUES %(values)s
+                ON CONFLICT (%(columns)s) DO UPDATE
+                   SET planned_hours = r.planned_hours + EXCLUDED.planned_hours,
+                       unit_amount = r.unit_amount + EXCLUDED.unit_amount,
+                       entry_count = r.entry_count + EXCLUDED.entry_count
+            """ % {'table': table, 'columns': columns, 'values': ', '.join(['%s'] * len(rows))}, rows)
+
+    @api.model
+    def _move_tasks_team(self, task_ids, old_team_id, new_team_id):
+        """Move the team x day totals of tasks whose team changed"""
+        self.env.cr.execute("""
+            SELECT task_id, subtask_id, user_id, date, planned_hours, unit_amount, entry_count
+              FROM task_timesheet_rollup_task_day
+             WHERE task_id = ANY(%s)
+        """, [list(task_ids)])
+        deltas = {}
+        for task_id, subtask_id, user_id, date, planned, unit_amount, count in self.env.cr.fetchall():
+            for team_id, sign in ((old_team_id, -1), (new_team_id, 1)):
+                deltas[(task_id, subtask_id, user_id, team_id, date)] = [sign * planned, sign * unit_amount, sign * count]
+        # task and user rollups are unchanged: only the team table differs between both keys
+        self._apply_deltas(deltas, tables=['task_timesheet_rollup_team_day'])
+
+    @api.model
+    def _remove_tasks(self, task_ids, team_by_task):
+        """Subtract deleted tasks (whose time logs are removed by cascade) from every rollup"""
+        self.env.cr.execute("""
+            SELECT task_id, subtask_id, user_id, date, planned_hours, unit_amount, entry_count
+              FROM task_timesheet_rollup_task_day
+             WHERE task_id = ANY(%s)
+        """, [list(task_ids)])
+        deltas = {
+            (task_id, subtask_id, user_id, team_by_task.get(task_id), date): [-planned, -unit_amount, -count]
+            for task_id, subtask_id, user_id, date, planned, unit_amount, count in self.env.cr.fetchall()
+        }
+        self._apply_deltas(deltas, tables=['task_timesheet_rollup_user_day', 'task_timesheet_rollup_team_day'])
+        self.env.cr.execute("DELETE FROM task_timesheet_rollup_task_day WHERE task_id = ANY(%s)", [list(task_ids)])
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.exceptions import AccessError, ValidationError
+from datetime import timedelta
+import threading
+import time
+
+# Workload results are shared by every dashboard polling the same team and window
+WORKLOAD_CACHE_TTL = 10  # seconds
+WORKLOAD_CACHE_SIZE = 256
+_workload_cache = {}
+_workload_cache_lock = threading.Lock()
+
+
+class TaskWorkload(models.AbstractModel):
+    """
+    Team workload engine: per-member load across a team and its sub-teams,
+    computed with grouped queries and kept in a short-lived in-process cache.
+    """
+    _name = 'task.workload'
+    _description = 'Team Workload'
+
+    @api.model
+    def get_team_workload(self, team_id, date_from=None, date_to=None):
+        """
+        Return the workload of a team subtree:
+        {'team_id', 'date_from', 'date_to', 'members': [{'user_id', 'name',
+         'open_tasks', 'overdue_tasks', 'planned_hours', 'logged_hours',
+         'logged_planned_hours', 'all_logged_hours'}], 'totals'}
+
+        Open and overdue counts cover the open tasks of the subtree assigned to
+        the member (as task assignee or on an open subtask), and planned_hours
+        their Planned Time: the remaining load, whatever the window. A task
+        with several assignees shares its Planned Time equally between them.
+        logged_hours and logged_planned_hours are the Actual Time and Planned
+        Time of the member's time log entries on the subtree between date_from
+        and date_to, and all_logged_hours the member's time logged on any task
+        in that window (their overall load).
+        """
+        team = self.env['task.team'].browse(team_id).exists()
+        if not team:
+            raise ValidationError(_('This team does not exist.'))
+        self._check_workload_access(team)
+        if not date_from:
+            today = fields.Date.context_today(self)
+            date_from = today - timedelta(days=today.weekday())
+        date_from = fields.Date.to_date(date_from)
+        date_to = fields.Date.to_date(date_to) if date_to else date_from + timedelta(days=6)
+
+        key = (self.env.cr.dbname, team.id, date_from, date_to, fields.Date.context_today(self))
+        now = time.monotonic()
+        with _workload_cache_lock:
+            cached = _workload_cache.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        result = self._compute_team_workload(team, date_from, date_to)
+        with _workload_cache_lock:
+            if len(_workload_cache) >= WORKLOAD_CACHE_SIZE:
+                for expired_key in [k for k, (expiry, _value) in _workload_cache.items() if expiry <= now]:
+                    del _workload_cache[expired_key]
+                if len(_workload_cache) >= WORKLOAD_CACHE_SIZE:
+                    _workload_cache.clear()
+            _workload_cache[key] = (now + WORKLOAD_CACHE_TTL, result)
+        return result
+
+    @api.model
+    def _check_workload_access(self, team):
+        """Task managers see every team; team managers see their team subtrees"""
+        if self.env.user.has_group('task_management.group_task_manager'):
+            return
+        ancestor_ids = [int(team_id) for team_id in team.sudo().parent_path.split('/') if team_id]
+        if self.env.user in self.env['task.team'].sudo().browse(ancestor_ids).manager_id:
+            return
+        raise AccessError(_('Only the managers of a team can see its workload.'))
+
+    @api.model
+    def _compute_team_workload(self, team, date_from, date_to):
+        Team = self.env['task.team'].sudo()
+        Team.flush_model(['parent_path'])
+        self.env['task.management'].flush_model(['team_id', 'user_id', 'date_deadline', 'is_closed', 'active'])
+        self.env['task.subtask'].flush_model(['parent_task_id', 'is_done', 'user_ids'])
+
+        self.env.cr.execute(
+            "SELECT id FROM task_team WHERE parent_path LIKE %s",
+            [team.sudo().parent_path + '%'],
+        )
+        team_ids = [row[0] for row in self.env.cr.fetchall()]
+        member_ids = Team._get_subtree_members([team.id]).get(team.id, frozenset())
+        empty = {
+            'open_tasks': 0, 'overdue_tasks': 0, 'planned_hours': 0.0,
+            'logged_hours': 0.0, 'logged_planned_hours': 0.0, 'all_logged_hours': 0.0,
+        }
+        workload = {user_id: dict(empty) for user_id in member_ids}
+
+        # Open and overdue tasks and their Planned Time per assignee (task
+        # assignee or open subtask assignee)
+        self.env.cr.execute("""
+            WITH open_tasks AS (
+                SELECT id, user_id, date_deadline, COALESCE(planned_hours, 0) AS planned_hours
+                  FROM task_management
+                 WHERE team_id = ANY(%(team_ids)s)
+                   AND active
+                   AND is_closed IS NOT TRUE
+            ), assignments AS (
+                SELECT id AS task_id, user_id
+                  FROM open_tasks
+                 WHERE user_id IS NOT NULL
+                 UNION
+                SELECT st.parent_task_id, rel.user_id
+                  FROM task_subtask st
+                  JOIN task_subtask_users_rel rel ON rel.subtask_id = st.id
+                  JOIN open_tasks ot ON ot.id = st.parent_task_id
+                 WHERE st.is_done IS NOT TRUE
+            ), shares AS (
+                SELECT task_id, user_id, COUNT(*) OVER (PARTITION BY task_id) AS assignee_count
+                  FROM assignments
+            )
+            SELECT s.user_id,
+                   COUNT(*),
+                   COUNT(*) FILTER (WHERE ot.date_deadline < %(today)s),
+                   SUM(ot.planned_hours / s.assignee_count)
+              FROM shares s
+              JOIN open_tasks ot ON ot.id = s.task_id
+          GROUP BY s.user_id
+        """, {'team_ids': team_ids, 'today': fields.Date.context_today(self)})
+        for user_id, open_count, overdue_count, planned_hours in self.env.cr.fetchall():
+            values = workload.setdefault(user_id, dict(empty))
+            values['open_tasks'] = open_count
+            values['overdue_tasks'] = overdue_count
+            values['planned_hours'] = planned_hours
+
+        # Time logged (and planned on the time logs) in the window, from the task x day rollup
+        self.env.cr.execute("""
+            SELECT r.user_id, SUM(r.planned_hours), SUM(r.unit_amount)
+              FROM task_timesheet_rollup_task_day r
+              JOIN task_management t ON t.id = r.task_id
+             WHERE t.team_id = ANY(%s)
+               AND r.date BETWEEN %s AND %s
+               AND r.user_id != 0
+          GROUP BY r.user_id
+        """, [team_ids, date_from, date_to])
+        for user_id, planned_hours, logged_hours in self.env.cr.fetchall():
+            values = workload.setdefault(user_id, dict(empty))
+            values['logged_planned_hours'] = planned_hours
+            values['logged_hours'] = logged_hours
+
+        # Overall time logged by each member in the window, from the user x day rollup
+        self.env.cr.execute("""
+            SELECT user_id, SUM(unit_amount)
+              FROM task_timesheet_rollup_user_day
+             WHERE user_id = ANY(%s)
+               AND date BETWEEN %s AND %s
+          GROUP BY user_id
+        """, [list(workload), date_from, date_to])
+        for user_id, logged_hours in self.env.cr.fetchall():
+            workload[user_id]['all_logged_hours'] = logged_hours
+
+        users = self.env['res.users'].sudo().browse(workload)
+        members = [
+            dict(workload[user.id], user_id=user.id, name=user.name, is_member=user.id in member_ids)
+            for user in users.sorted('name')
+        ]
+        totals = {
+            fname: sum(member[fname] for member in members)
+            for fname in ('open_tasks', 'overdue_tasks', 'planned_hours')
+        }
+
+        # Subtree hours, from the team x day rollup
+        self.env.cr.execute("""
+            SELECT COALESCE(SUM(planned_hours), 0), COALESCE(SUM(unit_amount), 0)
+              FROM task_timesheet_rollup_team_day
+             WHERE team_id = ANY(%s)
+               AND date BETWEEN %s AND %s
+        """, [team_ids, date_from, date_to])
+        totals['logged_planned_hours'], totals['logged_hours'] = self.env.cr.fetchone()
+        return {
+            'team_id': team.id,
+            'date_from': fields.Date.to_string(date_from),
+            'date_to': fields.Date.to_string(date_to),
+            'members': members,
+            'totals': totals,
+        }
@@ -0,0 +1,110 @@
+/** @odoo-module **/
+
+import { registry } from "@web/core/registry";
+import { useService } from "@web/core/utils/hooks";
+import { KanbanController } from "@web/views/kanban/kanban_controller";
+import { kanbanView } from "@web/views/kanban/kanban_view";
+import { getFieldsSpec } from "@web/model/relational_model/utils";
+import { onWillUnmount } from "@odoo/owl";
+
+const NOTIFICATION_TYPE = "task_management/kanban_update";
+// Bursts of notifications are applied together
+const APPLY_DELAY = 300;
+
+// Real-time task kanban: refresh only the cards named in a bus delta
+export class TaskKanbanController extends KanbanController {
+    setup() {
+        super.setup(...arguments);
+        this.busService = useService("bus_service");
+        this.orm = useService("orm");
+        this.pendingTaskUpdate = { tasks: new Map(), deleted: new Set() };
+        this.onTaskKanbanUpdate = (payload) => this.queueTaskKanbanUpdate(payload);
+        this.busService.subscribe(NOTIFICATION_TYPE, this.onTaskKanbanUpdate);
+        onWillUnmount(() => {
+            this.busService.unsubscribe(NOTIFICATION_TYPE, this.onTaskKanbanUpdate);
+            clearTimeout(this.taskKanbanTimeout);
+        });
+    }
+
+    queueTaskKanbanUpdate(payload) {
+        if (payload.reload) {
+            // Mass change: reload the board instead of applying a delta
+            this.pendingTaskUpdate.reload = true;
+        }
+        for (const card of payload.tasks || []) {
+            this.pendingTaskUpdate.tasks.set(card.id, card);
+        }
+        // Deleted tasks, and tasks this user can no longer see
+        for (const taskId of [...(payload.deleted || []), ...(payload.removed || [])]) {
+            this.pendingTaskUpdate.tasks.delete(taskId);
+            this.pendingTaskUpdate.deleted.add(taskId);
+        }
+        clearTimeout(this.taskKanbanTimeout);
+        this.taskKanbanTimeout = setTimeout(() => this.applyTaskKanbanUpdate(), APPLY_DELAY);
+    }
+
+    getTaskKanbanRecords() {
+        const root = this.model.root;
+        if (root.isGrouped) {
+            return root.groups.flatMap((group) => (group.list ? group.list.records : []));
+        }
+        return root.records;
+    }
+
+    async applyTaskKanbanUpdate() {
+        const { tasks, deleted, reload } = this.pendingTaskUpdate;
+        this.pendingTaskUpdate = { tasks: new Map(), deleted: new Set() };
+        const records = new Map(this.getTaskKanbanRecords().map((record) => [record.resId, record]));
+        const groupBy = this.model.root.groupBy && this.model.root.groupBy[0];
+        let reloadBoard = reload || [...deleted].some((taskId) => records.has(taskId));
+        const changedRecords = [];
+        for (const card of tasks.values()) {
+            const record = records.get(card.id);
+            if (!record) {
+                // New on this board, or moved into it
+                reloadBoard = true;
+                continue;
+            }
+            const groupField = groupBy && groupBy.split(":")[0];
+            const currentGroup = groupField && record.data[groupField];
+            const groupValue = Array.isArray(currentGroup) ? currentGroup[0] : currentGroup?.id ?? currentGroup;
+            if (groupField && groupField in card && groupValue !== (card[groupField] || false)) {
+                // The card changes column
+                reloadBoard = true;
+                continue;
+            }
+            if (!record.isDirty) {
+                changedRecords.push(record);
+            }
+        }
+        if (reloadBoard) {
+            await this.model.root.load();
+            return;
+        }
+        if (!changedRecords.length) {
+            return;
+        }
+        // One batched read for all the changed cards of the burst
+        const [{ activeFields, fields, context }] = changedRecords;
+        const values = await this.orm.webRead(
+            "task.management",
+            changedRecords.map((record) => record.resId),
+            { specification: getFieldsSpec(activeFields, fields, context), context }
+        );
+        const valuesById = new Map(values.map((data) => [data.id, data]));
+        for (const record of changedRecords) {
+            const data = valuesById.get(record.resId);
+            // Skip the cards edited meanwhile, and those gone out of reach
+            if (data && !record.isDirty) {
+                record._setData(data);
+            }
+        }
+    }
+}
+
+export const taskKanbanView = {
+    ...kanbanView,
+    Controller: TaskKanbanController,
+};
+
+registry.category("views").add("task_management_kanban", taskKanbanView);
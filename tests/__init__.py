@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+
+from . import test_query_scaling
+from . import test_task_hierarchy
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark harness for the module's hot paths.
+
+Not a test suite: run it from an Odoo shell on a copy of a real database,
+then dump the reports to compare two runs:
+
+    from odoo.addons.task_management.tests.benchmark import TaskBenchmark
+    report = TaskBenchmark(env).run_benchmarks(tasks=5000)
+    json.dump(report, open('/tmp/after.json', 'w'), indent=2, sort_keys=True)
+    TaskBenchmark.compare_benchmarks(json.load(open('/tmp/before.json')), report)
+"""
+
+from odoo import fields, release
+from contextlib import contextmanager
+from datetime import timedelta
+import random
+import statistics
+import time
+
+BENCHMARK_PREFIX = '[bench]'
+BENCHMARK_BATCH_SIZE = 100
+
+
+class TaskBenchmark:
+    """
+    Seeds a synthetic dataset, then times and counts the queries of the
+    critical operations. Everything runs in a savepoint that is rolled back
+    at the end (unless keep_data is set).
+    """
+
+    def __init__(self, env):
+        self.env = env
+
+    def run_benchmarks(self, teams=10, team_depth=3, users=20, tasks=1000, subtasks=3, logs=5,
+                       recurrences=20, rounds=3, seed=42, keep_data=False):
+        """
+        Seed a dataset and benchmark the hot paths.
+
+        :param teams: number of teams, spread over ``team_depth`` hierarchy levels
+        :param users: number of internal users spread over the teams
+        :param tasks: number of tasks (each with ``subtasks`` subtasks and ``logs`` time logs)
+        :param recurrences: number of recurring tasks due for the recurrence cron
+        :param rounds: number of measured runs per operation
+        :param keep_data: keep the seeded dataset instead of rolling it back
+        :return: the report: {'meta': {...}, 'results': {operation: measure}}
+        """
+        params = {
+            'teams': teams, 'team_depth': team_depth, 'users': users, 'tasks': tasks,
+            'subtasks': subtasks, 'logs': logs, 'recurrences': recurrences,
+            'rounds': rounds, 'seed': seed,
+        }
+        savepoint = self.env.cr.savepoint()
+        try:
+            started = time.perf_counter()
+            dataset = self._seed_dataset(random.Random(seed), **{
+                key: value for key, value in params.items() if key not in ('rounds', 'seed')
+            })
+            seed_duration = time.perf_counter() - started
+            results = self._run_operations(dataset, rounds)
+        finally:
+            savepoint.close(rollback=not keep_data)
+            if not keep_data:
+                self.env.invalidate_all()
+
+        return {
+            'meta': {
+                'date': fields.Datetime.to_string(fields.Datetime.now()),
+                'database': self.env.cr.dbname,
+                'odoo_version': release.version,
+                'params': params,
+                'seed_duration_ms': round(seed_duration * 1000, 2),
+            },
+            'results': results,
+        }
+
+    @staticmethod
+    def compare_benchmarks(baseline, current):
+        """
+        Compare two reports operation by operation.
+
+        :return: {operation: {'duration_ratio', 'queries_delta', 'rows_delta'}}
+            where a ratio above 1 means the current run is slower
+        """
+        baseline, current = baseline['results'], current['results']
+        comparison = {}
+        for name in sorted(set(baseline) & set(current)):
+            before, after = baseline[name], current[name]
+            comparison[name] = {
+                'duration_ratio': round(after['duration_ms']['median'] / before['duration_ms']['median'], 3)
+                if before['duration_ms']['median'] else None,
+                'queries_delta': after['queries'] - before['queries'],
+                'rows_delta': after['rows'] - before['rows'],
+            }
+        return comparison
+
+    # ========== MEASUREMENT ==========
+
+    @contextmanager
+    def _count_queries(self):
+        """Count the queries and the rows they return or affect within the block"""
+        cr = self.env.cr
+        counter = {'queries': 0, 'rows': 0}
+        execute = cr.execute
+
+        def counting_execute(query, params=None, log_exceptions=True):
+            result = execute(query, params, log_exceptions)
+            counter['queries'] += 1
+            counter['rows'] += max(cr.rowcount, 0)
+            return result
+
+        cr.execute = counting_execute
+        try:
+            yield counter
+        finally:
+            del cr.execute
+
+    def _measure(self, operation, rounds=1):
+        """
+        Run ``operation`` ``rounds`` times with a cold ORM cache, flushing
+        inside the measure so deferred writes are counted.
+
+        :return: {'rounds', 'duration_ms': {'min', 'median', 'max'}, 'queries', 'rows'}
+            where queries and rows are those of the last round
+        """
+        durations = []
+        counter = {}
+        for _round in range(rounds):
+            self.env.flush_all()
+            self.env.invalidate_all()
+            with self._count_queries() as counter:
+                started = time.perf_counter()
+                operation()
+                self.env.flush_all()
+                durations.append((time.perf_counter() - started) * 1000)
+        return {
+            'rounds': rounds,
+            'duration_ms': {
+                'min': round(min(durations), 2),
+                'median': round(statistics.median(durations), 2),
+                'max': round(max(durations), 2),
+            },
+            'queries': counter['queries'],
+            'rows': counter['rows'],
+        }
+
+    # ========== DATASET ==========
+
+    def _seed_dataset(self, rng, teams, team_depth, users, tasks, subtasks, logs, recurrences):
+        """Create the synthetic dataset; return the records the operations need"""
+        group = self.env.ref('task_management.group_task_user')
+        bench_users = self.env['res.users'].with_context(no_reset_password=True).create([{
+            'name': '%s User %s' % (BENCHMARK_PREFIX, index),
+            'login': 'task_bench_user_%s_%s' % (index, rng.randint(0, 10 ** 9)),
+            'groups_id': [(6, 0, [group.id])],
+        } for index in range(users)])
+
+        # Team hierarchy: every level hangs under a random team of the previous one
+        Team = self.env['task.team']
+        bench_teams = Team
+        levels = [Team]
+        per_level = max(1, teams // max(1, team_depth))
+        for level in range(team_depth):
+            count = teams - len(bench_teams) if level == team_depth - 1 else per_level
+            level_teams = Team
+            for index in range(max(0, count)):
+                members = rng.sample(bench_users.ids, min(len(bench_users), 5))
+                level_teams |= Team.create({
+                    'name': '%s Team %s.%s' % (BENCHMARK_PREFIX, level, index),
+                    'manager_id': members[0],
+                    'member_ids': [(6, 0, members)],
+                    'parent_team_id': rng.choice(levels[-1].ids) if levels[-1] else False,
+                })
+            levels.append(level_teams)
+            bench_teams |= level_teams
+
+        stage_ids = self.env['task.stage']._get_stage_ids().ids
+        today = fields.Date.context_today(self.env.user)
+        Task = self.env['task.management'].with_context(tracking_disable=True, mail_create_nolog=True)
+        task_ids = []
+        for start in range(0, tasks, 500):
+            vals_list = []
+            for index in range(start, min(start + 500, tasks)):
+                team = rng.choice(bench_teams) if bench_teams else Team
+                vals_list.append({
+                    'name': '%s Task %s' % (BENCHMARK_PREFIX, index),
+                    'task_type': 'team' if team else 'individual',
+                    'team_id': team.id,
+                    'user_id': rng.choice(team.member_ids.ids or bench_users.ids),
+                    'stage_id': rng.choice(stage_ids),
+                    'priority': rng.choice(['0', '1', '2', '3']),
+                    'planned_hours': rng.randint(1, 40),
+                    'date_deadline': today + timedelta(days=rng.randint(-30, 60)),
+                    'date_start': today - timedelta(days=rng.randint(31, 90)),
+                    'parent_id': rng.choice(task_ids) if task_ids and rng.random() < 0.1 else False,
+                })
+            task_ids += Task.create(vals_list).ids
+        bench_tasks = Task.browse(task_ids)
+
+        subtask_vals = [{
+            'name': '%s Subtask %s.%s' % (BENCHMARK_PREFIX, task.id, index),
+            'parent_task_id': task.id,
+            'user_ids': [(6, 0, [task.user_id.id])],
+            'is_done': rng.random() < 0.3,
+        } for task in bench_tasks for index in range(subtasks)]
+        bench_subtasks = self.env['task.subtask'].create(subtask_vals)
+
+        subtasks_by_task = {}
+        for subtask in bench_subtasks:
+            subtasks_by_task.setdefault(subtask.parent_task_id.id, []).append(subtask.id)
+        log_vals = [{
+            'name': '<p>%s work</p>' % BENCHMARK_PREFIX,
+            'task_id': task.id,
+            'subtask_id': rng.choice(subtasks_by_task[task.id]),
+            'user_id': task.user_id.id,
+            'date': today - timedelta(days=rng.randint(0, 30)),
+            'planned_hours': rng.randint(1, 8),
+            'unit_amount': rng.randint(1, 8),
+        } for task in bench_tasks if task.id in subtasks_by_task for _index in range(logs)]
+        self.env['task.timesheet.line'].create(log_vals)
+
+        # Recurring tasks whose next occurrence is already due
+        recurring_tasks = bench_tasks[:recurrences]
+        for task in recurring_tasks:
+            task.write({
+                'recurring_task': True,
+                'date_deadline': today - timedelta(days=rng.randint(1, 7)),
+                'recurrence_id': self.env['task.recurrence'].create({'recurrence_type': 'daily'}).id,
+            })
+        self.env.flush_all()
+        return {
+            'users': bench_users,
+            'teams': bench_teams,
+            'tasks': bench_tasks,
+        }
+
+    # ========== OPERATIONS ==========
+
+    def _run_operations(self, dataset, rounds):
+        Task = self.env['task.management']
+        user = dataset['users'][:1]
+        sample_tasks = dataset['tasks'][:BENCHMARK_BATCH_SIZE]
+        stage_ids = self.env['task.stage']._get_stage_ids().ids
+        counter = iter(range(10 ** 9))
+
+        def create_tasks():
+            index = next(counter)
+            Task.create([{
+                'name': '%s New task %s.%s' % (BENCHMARK_PREFIX, index, position),
+                'user_id': user.id,
+            } for position in range(BENCHMARK_BATCH_SIZE)])
+
+        def write_stage():
+            sample_tasks.write({'stage_id': stage_ids[next(counter) % len(stage_ids)]})
+
+        def write_planned_hours():
+            sample_tasks.write({'planned_hours': next(counter) % 40 + 1})
+
+        def refresh_task_report():
+            self.env['task.report']._refresh_report()
+
+        results = {
+            'task_create_batch_%s' % BENCHMARK_BATCH_SIZE: self._measure(create_tasks, rounds),
+            'task_write_stage_batch_%s' % BENCHMARK_BATCH_SIZE: self._measure(write_stage, rounds),
+            'task_write_planned_hours_batch_%s' % BENCHMARK_BATCH_SIZE: self._measure(write_planned_hours, rounds),
+            'kanban_read_group_admin': self._measure(
+                lambda: Task.web_read_group([], ['stage_id'], ['stage_id']), rounds),
+            'kanban_read_group_user': self._measure(
+                lambda: Task.with_user(user).web_read_group([], ['stage_id'], ['stage_id']), rounds),
+            'task_report_refresh': self._measure(refresh_task_report, rounds),
+            'task_report_pivot': self._measure(lambda: self.env['task.report'].read_group(
+                [], ['planned_hours:sum', 'total_logged_hours:sum'], ['stage_id', 'user_id'], lazy=False), rounds),
+            'timesheet_report_pivot': self._measure(lambda: self.env['timesheet.report'].read_group(
+                [], ['planned_hours:sum', 'unit_amount:sum'], ['user_id', 'date_month'], lazy=False), rounds),
+            'weekly_summary': self._measure(
+                lambda: self.env['task.timesheet.line'].with_user(user).get_weekly_summary(), rounds),
+            # /task_management/info serves the cached dashboard counters
+            'info_counters_uncached': self._measure(
+                lambda: Task.with_user(user)._compute_dashboard_stats(), rounds),
+            # The first round creates the due occurrences, the next ones measure an idle run
+            'recurrence_cron': self._measure(
+                lambda: self.env['task.recurrence']._cron_create_recurring_tasks(), rounds),
+        }
+        return results
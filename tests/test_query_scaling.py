@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests import TransactionCase, tagged
+from .benchmark import TaskBenchmark
+import math
+
+BATCH_SIZES = (1, 10, 100)
+# Maximum extra queries per additional record, per guarded operation. An N+1
+# regression shows up as about one more query per record, so every threshold
+# stays well below one (and close to zero for the batched create and writes).
+QUERY_GROWTH_THRESHOLDS = {
+    'task_create': 0.05,
+    'task_write_stage': 0.05,
+    'task_write_planned_hours': 0.05,
+    'task_write_user': 0.2,
+    'task_write_team': 0.2,
+    'team_write_members': 0.2,
+    'team_write_manager': 0.2,
+    'template_use': 0.2,
+    'template_instantiate': 0.2,
+}
+# Maximum extra rows fetched or affected per additional record: rows grow
+# linearly with the batch, but reading a whole team or all the tasks again
+# for every record makes them grow with its square
+ROW_GROWTH_THRESHOLDS = {
+    'task_create': 30,
+    'task_write_stage': 15,
+    'task_write_planned_hours': 15,
+    'task_write_user': 15,
+    'task_write_team': 15,
+    'team_write_members': 20,
+    'team_write_manager': 20,
+    'template_use': 10,
+    'template_instantiate': 30,
+}
+
+
+@tagged('post_install', '-at_install')
+class TestQueryScaling(TransactionCase):
+    """
+    Query-count regression guards for the core operations.
+
+    Each operation is measured on a single record, then must run on every
+    batch of BATCH_SIZES within that count of queries and rows plus its
+    growth thresholds for every additional record.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestQueryScaling, cls).setUpClass()
+        group = cls.env.ref('task_management.group_task_user')
+        cls.users = cls.env['res.users'].with_context(no_reset_password=True).create([{
+            'name': 'Guard user %s' % index,
+            'login': 'task_guard_user_%s' % index,
+            'groups_id': [(6, 0, [group.id])],
+        } for index in range(2)])
+        cls.team = cls.env['task.team'].create({'name': 'Guard team', 'manager_id': cls.users[0].id})
+        cls.stage_ids = cls.env['task.stage']._get_stage_ids().ids
+
+    # ========== HELPERS ==========
+
+    def _task_vals(self, size):
+        return [{'name': 'Guard task %s' % index, 'user_id': self.users[0].id} for index in range(size)]
+
+    def _create_teams(self, size):
+        teams = self.env['task.team'].create([{
+            'name': 'Guard team %s' % index,
+            'manager_id': self.users[0].id,
+        } for index in range(size)])
+        self.env['task.management'].create([
+            dict(vals, team_id=teams[index].id, task_type='team')
+            for index, vals in enumerate(self._task_vals(size))
+        ])
+        return teams
+
+    def _measure(self, operation):
+        """Run ``operation`` with a cold cache; return its {'queries', 'rows'}, flush included"""
+        self.env.flush_all()
+        self.env.invalidate_all()
+        with TaskBenchmark(self.env)._count_queries() as counter:
+            operation()
+            self.env.flush_all()
+        return counter
+
+    def assertQueryScaling(self, operation, prepare):
+        """
+        Check that ``prepare(size)()`` does not need more than the thresholds
+        of extra queries and rows per record over its single record cost.
+        """
+        base = self._measure(prepare(BATCH_SIZES[0]))
+        for size in BATCH_SIZES[1:]:
+            extra = size - BATCH_SIZES[0]
+            max_queries = base['queries'] + math.floor(QUERY_GROWTH_THRESHOLDS[operation] * extra)
+            max_rows = base['rows'] + ROW_GROWTH_THRESHOLDS[operation] * extra
+            run = prepare(size)
+            self.env.flush_all()
+            self.env.invalidate_all()
+            with self.subTest(operation=operation, size=size):
+                with TaskBenchmark(self.env)._count_queries() as counter, self.assertQueryCount(max_queries):
+                    run()
+                self.assertLessEqual(
+                    counter['rows'], max_rows,
+                    '%s fetches %s rows for %s records (max %s)' % (operation, counter['rows'], size, max_rows))
+
+    # ========== TASKS ==========
+
+    def test_task_create(self):
+        Task = self.env['task.management']
+        self.assertQueryScaling('task_create', lambda size: lambda: Task.create(self._task_vals(size)))
+
+    def _prepare_task_write(self, values):
+        def prepare(size):
+            tasks = self.env['task.management'].create(self._task_vals(size))
+            return lambda: tasks.write(values)
+        return prepare
+
+    def test_task_write_stage(self):
+        self.assertQueryScaling('task_write_stage', self._prepare_task_write({'stage_id': self.stage_ids[-1]}))
+
+    def test_task_write_planned_hours(self):
+        self.assertQueryScaling('task_write_planned_hours', self._prepare_task_write({'planned_hours': 12.5}))
+
+    def test_task_write_user(self):
+        self.assertQueryScaling('task_write_user', self._prepare_task_write({'user_id': self.users[1].id}))
+
+    def test_task_write_team(self):
+        self.assertQueryScaling('task_write_team', self._prepare_task_write({
+            'team_id': self.team.id,
+            'task_type': 'team',
+        }))
+
+    # ========== TEAMS ==========
+
+    def test_team_write_members(self):
+        def prepare(size):
+            teams = self._create_teams(size)
+            return lambda: teams.write({'member_ids': [(4, self.users[1].id)]})
+        self.assertQueryScaling('team_write_members', prepare)
+
+    def test_team_write_manager(self):
+        def prepare(size):
+            teams = self._create_teams(size)
+            return lambda: teams.write({'manager_id': self.users[1].id})
+        self.assertQueryScaling('team_write_manager', prepare)
+
+    # ========== TEMPLATES ==========
+
+    def test_template_use(self):
+        """Instantiation cost must not grow with the number of subtask templates"""
+        def prepare(size):
+            template = self.env['task.template'].create({
+                'name': 'Guard template',
+                'subtask_template_ids': [(0, 0, {'name': 'Step %s' % index, 'sequence': index}) for index in range(size)],
+            })
+            return template.action_use_template
+        self.assertQueryScaling('template_use', prepare)
+
+    def test_template_instantiate(self):
+        def prepare(size):
+            template = self.env['task.template'].create({
+                'name': 'Guard template',
+                'subtask_template_ids': [(0, 0, {'name': 'Step %s' % index, 'sequence': index}) for index in range(3)],
+            })
+            return lambda: template.instantiate([{'user_id': self.users[index % 2].id} for index in range(size)])
+        self.assertQueryScaling('template_instantiate', prepare)
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestTaskHierarchy(TransactionCase):
+    """Deleting and archiving tasks inside a task tree"""
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestTaskHierarchy, cls).setUpClass()
+        Task = cls.env['task.management']
+        cls.root = Task.create({'name': 'Root', 'planned_hours': 1.0})
+        cls.middle = Task.create({'name': 'Middle', 'planned_hours': 2.0, 'parent_id': cls.root.id})
+        cls.leaf = Task.create({'name': 'Leaf', 'planned_hours': 4.0, 'parent_id': cls.middle.id})
+
+    def test_unlink_reparents_children(self):
+        self.middle.unlink()
+        self.assertEqual(self.leaf.parent_id, self.root)
+        self.assertEqual(self.root.child_ids, self.leaf)
+        self.assertEqual(self.root.subtree_planned_hours, 5.0)
+        self.assertEqual(self.root.subtree_open_count, 1)
+
+    def test_unlink_with_ancestor(self):
+        """Children go up to the closest ancestor that is not deleted with them"""
+        (self.root | self.middle).unlink()
+        self.assertFalse(self.leaf.parent_id)
+        self.assertEqual(self.leaf.parent_path, '%s/' % self.leaf.id)
+
+    def test_unlink_whole_tree(self):
+        tasks = self.root | self.middle | self.leaf
+        tasks.unlink()
+        self.assertFalse(tasks.exists())
+
+    def test_unlink_team_with_task_tree(self):
+        team = self.env['task.team'].create({'name': 'Tree team', 'manager_id': self.env.user.id})
+        (self.root | self.middle).write({'team_id': team.id, 'task_type': 'team'})
+        team.unlink()
+        self.assertFalse((self.root | self.middle).exists())
+        self.assertTrue(self.leaf.exists())
+        self.assertFalse(self.leaf.parent_id)
+
+    def test_archive_child_updates_rollups(self):
+        self.assertEqual(self.root.subtree_planned_hours, 7.0)
+        self.leaf.action_archive()
+        self.assertEqual(self.middle.subtree_planned_hours, 2.0)
+        self.assertEqual(self.root.subtree_planned_hours, 3.0)
+        self.assertEqual(self.root.subtree_open_count, 1)